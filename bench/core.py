@@ -0,0 +1,166 @@
+"""Timings of the core memory card operations.
+
+Builds synthetic cards (see synthetic.py) for every card size and profile
+count asked for and times the operations the CLI and the GUI run on them.
+Results go out as json so two commits can be compared with --compare.
+
+    python bench/core.py [--sizes 8 32] [--profiles 1 25 100] [--repeat 10]
+                         [--out result.json] [--compare baseline.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable
+
+from synthetic import ROOT, make_card
+
+from mymcplus.ps2mc import ps2mc
+
+from src.core import (
+    extract_all, extract_from_name, find_profiles, get_all_race_info,
+    get_races_file, invalidate_races_file, pack
+)
+
+# Slower than this much against the baseline counts as a regression,
+# unless the difference is below the timer noise
+DEFAULT_TOLERANCE = 1.5
+NOISE_MS = 0.05
+
+def measure(fn: Callable[[], object], repeat: int, setup: Callable[[], object] | None = None) -> dict[str, float]:
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        # Some operations print their progress, keep it out of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+    return {
+        "min_ms": round(min(times) * 1000, 3),
+        "median_ms": round(statistics.median(times) * 1000, 3),
+    }
+
+def bench_card(path: str, profiles: list[str], repeat: int, workdir: str) -> dict[str, dict[str, float]]:
+    profile = profiles[len(profiles) // 2]
+    out = os.path.join(workdir, "out")
+    results = {}
+
+    with open(path, "r+b") as f:
+        memcard = ps2mc(f)
+        try:
+            results["memcard.check"] = measure(memcard.check, repeat)
+            # ProfileSelect.find_all_profiles is a thin wrapper around this
+            results["find_profiles"] = measure(
+                lambda: find_profiles(memcard), repeat,
+                setup=lambda: invalidate_races_file(memcard),
+            )
+            results["find_profiles.warm"] = measure(lambda: find_profiles(memcard), repeat)
+            results["get_races_file.cold"] = measure(
+                lambda: get_races_file(memcard, profile), repeat,
+                setup=lambda: invalidate_races_file(memcard),
+            )
+            results["get_races_file.warm"] = measure(lambda: get_races_file(memcard, profile), repeat)
+
+            racefile = get_races_file(memcard, profile)
+            results["get_all_race_info"] = measure(lambda: get_all_race_info(racefile), repeat)
+
+            name = f"{profile[-4:]} DET 7"
+            results["extract_from_name"] = measure(lambda: extract_from_name(memcard, profile, name, None, out), repeat)
+            results["extract_all"] = measure(
+                lambda: extract_all(memcard, profile, out), repeat,
+                setup=lambda: shutil.rmtree(out, ignore_errors=True),
+            )
+
+            # Packing a race back into its own slot keeps the card the same between runs
+            race_file = os.path.join(out, f"{profile[-4:]} DET 7.det.mc3race")
+            results["pack"] = measure(lambda: pack(memcard, profile, race_file, 7, name), repeat)
+        finally:
+            memcard.close()
+
+    return results
+
+def git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, check=True, capture_output=True, text=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list[str]:
+    """One line per benchmark present in both runs, regressions are marked."""
+    old = {(case["size_mb"], case["profiles"]): case["timings"] for case in baseline["cases"]}
+    lines = []
+    for case in result["cases"]:
+        timings = old.get((case["size_mb"], case["profiles"]))
+        if timings is None:
+            continue
+        for bench, timing in case["timings"].items():
+            # The fastest run is the least disturbed by the rest of the machine
+            if bench not in timings or timings[bench]["min_ms"] == 0:
+                continue
+            ratio = timing["min_ms"] / timings[bench]["min_ms"]
+            slower = timing["min_ms"] - timings[bench]["min_ms"] > NOISE_MS
+            mark = "  REGRESSION" if ratio > tolerance and slower else ""
+            lines.append(f"{case['size_mb']:>4} MiB {case['profiles']:>5} profiles  {bench:<22} {ratio:6.2f}x{mark}")
+    return lines
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Time the core memory card operations on synthetic cards")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[8, 32], help="Card sizes in MiB")
+    parser.add_argument("--profiles", type=int, nargs="+", default=[1, 25, 100], help="Profile counts")
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per measurement")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the synthetic cards")
+    parser.add_argument("--out", help="Write the json result here instead of stdout")
+    parser.add_argument("--compare", metavar="BASELINE", help="json result of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Slowdown ratio counted as a regression")
+    args = parser.parse_args()
+
+    result = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "cases": [],
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for size_mb in args.sizes:
+            for count in args.profiles:
+                path = os.path.join(workdir, f"{size_mb}mb-{count}.ps2")
+                profiles = make_card(path, size_mb, count, args.seed)
+                print(f"{size_mb} MiB card, {count} profiles", file=sys.stderr)
+                result["cases"].append({
+                    "size_mb": size_mb,
+                    "profiles": count,
+                    "timings": bench_card(path, profiles, args.repeat, workdir),
+                })
+                os.remove(path)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=1)
+    else:
+        print(json.dumps(result, indent=1))
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        lines = compare(result, baseline, args.tolerance)
+        print("\n".join(lines), file=sys.stderr)
+        if any(line.endswith("REGRESSION") for line in lines):
+            return 1
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""Startup cost of the headless CLI.
+
+Times how long importing the CLI takes on top of a bare interpreter, over
+several fresh processes, and fails when the median goes over the budget or
+when the CLI drags in a GUI or optional dependency.
+
+    python bench/startup.py [--runs 15] [--budget-ms 80] [--json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules the CLI must never import at startup
+FORBIDDEN = ("PySide6", "qt_themes", "numpy")
+
+PROBE = f"""
+import sys
+sys.path.insert(0, {ROOT!r})
+import src.cmd
+loaded = [name for name in {FORBIDDEN!r} if name in sys.modules]
+if loaded:
+    print(",".join(loaded))
+"""
+
+def run(code: str) -> tuple[float, str]:
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return time.perf_counter() - start, out.strip()
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check the import cost of the headless CLI")
+    parser.add_argument("--runs", type=int, default=15, help="Fresh processes per measurement")
+    parser.add_argument("--budget-ms", type=float, default=80.0, help="Allowed import cost on top of a bare interpreter")
+    parser.add_argument("--json", action="store_true", help="Print the result as json")
+    args = parser.parse_args()
+
+    bare = statistics.median(run("pass")[0] for _ in range(args.runs))
+    cli_runs = [run(PROBE) for _ in range(args.runs)]
+    cli = statistics.median(elapsed for elapsed, _ in cli_runs)
+    loaded = sorted({name for _, out in cli_runs if out for name in out.split(",")})
+
+    cost_ms = (cli - bare) * 1000
+    result = {
+        "bare_ms": round(bare * 1000, 2),
+        "cli_ms": round(cli * 1000, 2),
+        "import_cost_ms": round(cost_ms, 2),
+        "budget_ms": args.budget_ms,
+        "forbidden_loaded": loaded,
+        "ok": cost_ms <= args.budget_ms and not loaded,
+    }
+
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print(f"bare interpreter  {result['bare_ms']:8.2f} ms")
+        print(f"cli startup       {result['cli_ms']:8.2f} ms")
+        print(f"import cost       {result['import_cost_ms']:8.2f} ms (budget {args.budget_ms:.0f} ms)")
+        if loaded:
+            print(f"cli imported {', '.join(loaded)}!")
+
+    return 0 if result["ok"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""Synthetic memory cards for the benchmarks.
+
+Formats a fresh .ps2 image with mymcplus and fills it with Midnight Club 3
+profiles whose racefiles hold random race blocks with readable names.
+
+    python bench/synthetic.py card.ps2 [--size-mb 8] [--profiles 10] [--seed 1]
+"""
+import argparse
+import os
+import random
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from mymcplus.ps2mc import ps2mc
+
+from src.core import MAX_NAME, PROFILE_PREFIX, all_race_slots, get_offset_from_city_and_code
+
+PAGE_SIZE = 512
+PAGES_PER_ERASE_BLOCK = 16
+
+# Everything past the last city is kept, the game stores more than races in file01
+RACEFILE_SIZE = 0x3400
+
+def card_params(size_mb: int) -> tuple[bool, int, int, int]:
+    return (True, PAGE_SIZE, PAGES_PER_ERASE_BLOCK, size_mb * 1024 * 1024 // PAGE_SIZE)
+
+def profile_names(count: int) -> list[str]:
+    return [f"BENCH{i:04d}" for i in range(count)]
+
+def make_racefile(rnd: random.Random, profile: str) -> bytes:
+    racefile = bytearray(rnd.randbytes(RACEFILE_SIZE))
+    for city, code in all_race_slots():
+        race_loc = get_offset_from_city_and_code(city, code)
+        name = f"{profile[-4:]} {city} {code}".encode("ascii")
+        racefile[race_loc + 0x02 : race_loc + 0x02 + MAX_NAME] = name.ljust(MAX_NAME, b"\x00")
+    return bytes(racefile)
+
+def make_card(path: str, size_mb: int = 8, profiles: int = 10, seed: int = 1) -> list[str]:
+    """Write a new card at path, returns the profile names in it."""
+    rnd = random.Random(seed)
+    names = profile_names(profiles)
+    with open(path, "w+b") as f:
+        memcard = ps2mc(f, params=card_params(size_mb))
+        try:
+            for profile in names:
+                memcard.mkdir(f"{PROFILE_PREFIX}{profile}")
+                racefile = memcard.open(f"{PROFILE_PREFIX}{profile}/file01", "wb")
+                racefile.write(make_racefile(rnd, profile))
+                racefile.close()
+        finally:
+            memcard.close()
+    return names
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build a synthetic memory card")
+    parser.add_argument("path", help="Where to write the .ps2 image")
+    parser.add_argument("--size-mb", type=int, default=8, help="Card size in MiB")
+    parser.add_argument("--profiles", type=int, default=10, help="Number of profiles to create")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the race blocks")
+    args = parser.parse_args()
+
+    make_card(args.path, args.size_mb, args.profiles, args.seed)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
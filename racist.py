@@ -1,5 +1,12 @@
-import src.gui as gui
+import sys
+from multiprocessing import freeze_support
 
 if __name__ == "__main__":
-    gui.main()
-
+    freeze_support()
+    if len(sys.argv) > 1:
+        # Headless, never loads Qt
+        import src.cmd as cmd
+        sys.exit(cmd.main())
+    else:
+        import src.gui as gui
+        gui.main()
@@ -17,7 +17,7 @@ a = Analysis(
     pathex=['src'],
     binaries=[],
     datas=assets_datas,
-    hiddenimports=[],   # let PyInstaller auto-detect Qt modules
+    hiddenimports=["numpy"],   # the race grid imports it lazily, Qt modules are auto-detected
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -52,3 +52,21 @@ exe = EXE(
     console=False,
     icon='assets/icon.ico',
 )
+
+# Same program as a console exe, for the command line: the windowed one has
+# no stdout/stderr, so racist <memory-card-file> ... would print nothing
+cli_exe = EXE(
+    pyz,
+    a.scripts,
+    a.binaries,
+    a.zipfiles,
+    a.datas,
+    [],
+    name='racist-cli',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=True,
+    icon='assets/icon.ico',
+)
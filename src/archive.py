@@ -0,0 +1,165 @@
+# .mc3pack, many races in one file
+#
+#   header   ">4sII"       magic, version, race count
+#   index    ">8sB17sII"   city, slot, name, block offset, crc32 of the block, one per race
+#   blocks   RACE_SIZE bytes each, in index order
+#
+# The index comes first and every size is known up front, so an archive can be
+# written straight to a pipe and a single race read back with one seek.
+import struct
+import zlib
+from typing import BinaryIO, Iterable, NamedTuple, Sequence
+
+from mymcplus.ps2mc import ps2mc
+
+from .core import (
+    CITIES_ADDR, RACE_QTD, RACE_SIZE, PackBatchEntry, RaceRecord, RaceSelector, RaceSlot,
+    make_batch_entry, pack_batch, select_race_blocks
+)
+
+PACK_MAGIC   = b'RAPK'
+PACK_VERSION = 1
+PACK_EXT     = ".mc3pack"
+
+HEADER = struct.Struct(">4sII")
+ENTRY  = struct.Struct(">8sB17sII")
+
+# Member name or position in the archive, slot to store it at (None keeps the
+# one it was archived from) and an optional new name
+ArchiveItem = tuple[str | int, int | None, str | None]
+
+class ArchiveEntry(NamedTuple):
+    name: str
+    city: str
+    slot: int
+    offset: int
+    crc: int
+
+def write_archive(f: BinaryIO, races: Sequence[RaceSlot]) -> int:
+    """Write races as a .mc3pack to f, which only needs to support write(). Returns the race count."""
+    data_start = HEADER.size + len(races) * ENTRY.size
+    index = [HEADER.pack(PACK_MAGIC, PACK_VERSION, len(races))]
+    for i, race in enumerate(races):
+        index.append(ENTRY.pack(
+            race.city.encode('ascii'),
+            race.slot,
+            race.name.encode('ascii'),
+            data_start + i * RACE_SIZE,
+            zlib.crc32(race.block),
+        ))
+    f.write(b"".join(index))
+    for race in races:
+        f.write(race.block)
+    return len(races)
+
+def archive_races(
+    memcard: ps2mc,
+    profile: str,
+    f: BinaryIO,
+    selectors: Iterable[RaceSelector] | None = None,
+) -> int:
+    """Archive the selected races of a profile, every race when selectors is None."""
+    return write_archive(f, select_race_blocks(memcard, profile, selectors))
+
+class RaceArchive:
+    """Reads the index of a .mc3pack, race blocks are only read when asked for."""
+
+    def __init__(self, f: BinaryIO, filename: str = PACK_EXT):
+        self.f = f
+        self.filename = filename
+
+        header = f.read(HEADER.size)
+        if len(header) != HEADER.size:
+            raise Exception(f"{filename} is not a race archive!")
+        magic, version, count = HEADER.unpack(header)
+        if magic != PACK_MAGIC:
+            raise Exception(f"{filename} is not a race archive!")
+        if version != PACK_VERSION:
+            raise Exception(f"{filename} is a version {version} race archive, only version {PACK_VERSION} is supported!")
+
+        index = f.read(count * ENTRY.size)
+        if len(index) != count * ENTRY.size:
+            raise Exception(f"{filename} is truncated!")
+
+        self.entries: list[ArchiveEntry] = []
+        for city_bytes, slot, name_bytes, offset, crc in ENTRY.iter_unpack(index):
+            city = city_bytes.decode('ascii', errors='ignore').rstrip('\x00')
+            if city not in CITIES_ADDR or not 0 <= slot < RACE_QTD:
+                raise Exception(f"{filename} has a race at unknown slot {city}_{slot}!")
+            name = name_bytes.decode('ascii', errors='ignore').rstrip('\x00')
+            self.entries.append(ArchiveEntry(name, city, slot, offset, crc))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __enter__(self) -> "RaceArchive":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.f.close()
+
+    def find(self, name: str) -> ArchiveEntry | None:
+        for entry in self.entries:
+            if entry.name == name:
+                return entry
+        return None
+
+    def entry(self, member: str | int) -> ArchiveEntry:
+        if isinstance(member, int):
+            if not 0 <= member < len(self.entries):
+                raise Exception(f"{self.filename} has no race #{member}!")
+            return self.entries[member]
+        entry = self.find(member)
+        if entry is None:
+            raise Exception(f"Race {member} not found in {self.filename}!")
+        return entry
+
+    def read(self, member: str | int | ArchiveEntry) -> bytes:
+        """The race block of one member, read with a single seek."""
+        entry = member if isinstance(member, ArchiveEntry) else self.entry(member)
+        self.f.seek(entry.offset)
+        block = self.f.read(RACE_SIZE)
+        if len(block) != RACE_SIZE:
+            raise Exception(f"{self.filename} is truncated!")
+        if zlib.crc32(block) != entry.crc:
+            raise Exception(f"Race {entry.name} is corrupted in {self.filename}!")
+        return block
+
+def open_archive(filename: str) -> RaceArchive:
+    f = open(filename, "rb")
+    try:
+        return RaceArchive(f, filename)
+    except Exception:
+        f.close()
+        raise
+
+def load_archive_batch(archive: RaceArchive, items: Iterable[ArchiveItem] | None = None) -> list[PackBatchEntry]:
+    """Same as load_pack_batch, for members of an archive. Every race goes back to its own slot when items is None."""
+    if items is None:
+        items = [(i, None, None) for i in range(len(archive))]
+
+    batch = []
+    for member, position, new_name in items:
+        entry = archive.entry(member)
+        block = archive.read(entry)
+        if position is None:
+            position = entry.slot
+        batch.append(make_batch_entry(f"{archive.filename}:{entry.name}", entry.city, position, block, new_name))
+    return batch
+
+def pack_archive(
+    memcard: ps2mc,
+    profile: str,
+    filename: str,
+    items: Iterable[ArchiveItem] | None = None,
+) -> list[RaceRecord]:
+    """pack_many for an archive, the whole selection lands with a single write."""
+    with open_archive(filename) as archive:
+        batch = load_archive_batch(archive, items)
+    return pack_batch(memcard, profile, batch)
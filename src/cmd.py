@@ -1,18 +1,45 @@
-# not used at all
-# obsolete by the UI version
+# Headless interface, racist.py runs it whenever it is started with arguments
+import argparse
+import io
+import os
+import sys
+from mymcplus.ps2mc import ps2mc
 from .core import *
 
-def main():
+def main(argv: list[str] | None = None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == "fleet":
+        return fleet_main(argv[1:])
+    if argv and argv[0] == "library":
+        return library_main(argv[1:])
+    if argv and argv[0] == "snapshots":
+        return snapshots_main(argv[1:])
+    if argv and argv[0] == "index":
+        return index_main(argv[1:])
+
     parser = argparse.ArgumentParser(
     prog='Racist',
     description='Python utility for sharing custom Midnight Club 3 races',
     usage="""
 racist <memory-card-file> <profile-name> -x  -n <race-name> -f <output-file> (extracts single race)
 racist <memory-card-file> <profile-name> -xa -d <output-directory> (extracts all races from the save file)
-racist <memory-card-file> <profile-name> -p  -r <race-id> -f <input-file> (upload race to savegame)
+racist <memory-card-file> <profile-name> -p  -s <race-id> -f <input-file> [-s <race-id> -f <input-file> ...] (upload races to savegame)
+racist <memory-card-file> <profile-name> -x [-a | -n <race-name>] -A <archive-file> (extracts races into one .mc3pack, - for stdout)
+racist <memory-card-file> <profile-name> -p  -A <archive-file> [-n <race-name> -s <race-id> [-R <new-name>]] (upload races from a .mc3pack)
+racist <memory-card-file> <profile-name> -p  -d <input-directory> [-s <race-id> ...] [--on-collision <policy>] (upload every race of a directory, to the given or empty slots)
 racist <memory-card-file> <profile-name> -l (list all races of the savegame)
+racist <memory-card-file> <profile-name> --copy | --move | --swap [<profile>:]<city>_<slot> [<profile>:]<city>_<slot> (between slots of the card, like --move SD_3 ALICE:SD_7)
+racist <memory-card-file> <profile-name> -U | --redo (undo or redo the last pack of the profile, see <memory-card-file>.mc3journal)
+racist <memory-card-file> <profile-name> -e <output-file> (export the race table as .csv, .json or .npz, needs numpy)
+racist <memory-card-file> <profile-name> -x [-a | -n <race-name>] -L <library-file> (adds races to the race library)
+racist <memory-card-file> <profile-name> -p  -L <library-file> -n <race-name-or-hash> [-s <race-id>] [-R <new-name>] (upload a race from the library)
+racist library <library-file> [-s <pattern>] (search the race library)
+racist snapshots <memory-card-file> [-r <snapshot-id> | --prune <count>] (list or restore the snapshots taken before every write)
+racist fleet <memory-card-file-or-directory>... -h (run profiles/list/extract/export over many memory cards)
+racist index <index-file> [<memory-card-file-or-directory>...] [-s <pattern> | -H <hash>] (index many memory cards and find races in them)
     """,
-    epilog="Remember to backup your save!"
+    epilog="Remember to backup your save! Writes are snapshotted first, see racist snapshots -h."
 )
     parser.add_argument('memcard', help='.ps2 Memory card file')
     parser.add_argument('profile', help='Profile name of the save file')
@@ -20,61 +47,346 @@ racist <memory-card-file> <profile-name> -l (list all races of the savegame)
     group.add_argument('-x', '--extract', action='store_true', help='Extract race mode')
     group.add_argument('-p', '--pack', action='store_true', help='Pack race mode')
     group.add_argument('-l', '--list_races', action='store_true', help='List races from save file')
-    parser.add_argument('-f', '--file', help='File to write/read the race file')
+    group.add_argument('-e', '--export', help='Export the race table to a .csv, .json or .npz file')
+    group.add_argument('--copy', nargs=2, metavar=('FROM', 'TO'), help='Copy a race to another slot, of this or another profile')
+    group.add_argument('--move', nargs=2, metavar=('FROM', 'TO'), help='Move a race to another slot, leaving its old slot empty')
+    group.add_argument('--swap', nargs=2, metavar=('FROM', 'TO'), help='Swap the races of two slots')
+    group.add_argument('-U', '--undo', action='store_true', help='Undo the last pack, if the save game did not change since')
+    group.add_argument('--redo', action='store_true', help='Redo the last undone pack')
+    parser.add_argument('-f', '--file', action='append', help='File to write/read the race file, repeat it to pack several races at once')
     parser.add_argument('-a', '--all', action='store_true', help='Extract alraces')
-    parser.add_argument('-d', '--directory', help='Directory to write the extracted races with the -a mode')
-    parser.add_argument('-s', '--store_at', help='A slot 0-14 to store the race', type=int)
+    parser.add_argument('-d', '--directory', help='Directory to write the extracted races with the -a mode, or to pack every race from with -p')
+    parser.add_argument('-s', '--store_at', action='append', help='A slot 0-14 to store the race, one for each -f', type=int)
     parser.add_argument('-n', '--race_name', help='The name of the race as shown in the editor')
-    parser.add_argument('-R', '--rename', help='The name of the race as shown in the editor')
-    args = parser.parse_args()
+    parser.add_argument('-R', '--rename', action='append', help='The new name of the race as shown in the editor, one for each -f')
+    parser.add_argument('-A', '--archive', help='.mc3pack archive to extract into or pack from, - for stdout/stdin')
+    parser.add_argument('--on-collision', choices=COLLISION_POLICIES, default='error', help='What -p -d does with a race whose name is already taken (default: error)')
+    parser.add_argument('-L', '--library', help='Race library to extract into or pack from instead of race files')
+    parser.add_argument('--no-journal', action='store_true', help='Pack without recording the change in the undo journal')
+    parser.add_argument('--no-snapshot', action='store_true', help='Write without snapshotting the memory card first')
+    parser.add_argument('--check', choices=('quick', 'full'), help='Check the memory card file system first, full checks are remembered per image')
+    parser.add_argument('--stats', action='store_true', help='Print card I/O, decoding and file write counters and timings to stderr when done')
+    args = parser.parse_args(argv)
+
+    if args.stats:
+        enable_stats()
 
     if not os.path.exists(args.memcard):
         raise Exception("Path to the memory card does not exist or it is wrong")
+
+    if args.list_races and args.check is None:
+        # An unchanged image lists straight from the race cache
+        cached = load_race_cache(args.memcard, args.profile)
+        if cached is not None and cached.fresh:
+            print_races(cached.races)
+            if args.stats:
+                print(cast(Stats, get_stats()).report(), file=sys.stderr)
+            return
+
     memcard: ps2mc
     with open(args.memcard, "rb+") as f:
         memcard = ps2mc(f)
-        mem = memcard.open(f'BASLUS-21355{args.profile}/file01', "rb")
-        if mem is None:
-            raise Exception(f"{args.profile} profile does not exist in this memory card1")
-        mem.close()
-        if args.extract:
-            if args.all:
-                directory = args.directory
-                if directory is None:
-                    directory = "./extracted_races"
-                    print("No output directory informed, using the default directory name! Use -d <directory> to set the output directory next time!")
-                extract_all(memcard, args.profile, directory)
-            else:
-                file = args.file
-                if file is None:
-                    print("No output file informed, using the default file name! Use -f <file> to set the output file next time!")
-                if args.race_name is None:
-                    raise Exception("No race name to be extracted informe! Use -n <race-name> next time!")
-                if args.directory is None:
-                    args.directory = "./"
-                extract_from_name(memcard, args.profile, args.race_name, file, args.directory)
-        elif args.pack:
-            if args.store_at is None:
-                raise Exception("Where to store the race? Use -s <position>")
-            if args.file is None:
-                raise Exception("No input race file informed! Use -f <file> next time when unpacking")
-            if not os.path.exists(args.file):
-                raise Exception("Race informed is does not exist or the path is wrong!")
-            if args.store_at is None:
-                raise Exception("Index to store at not set! Use -s <position> (needs to be between 0..14) next time.")
-            if args.store_at < 0 or args.store_at > 14:
+        if args.check is not None and not check_memcard(memcard, args.memcard, args.check == "quick"):
+            raise Exception("Memory card not valid! Its file system is damaged")
+        # Also warms the racefile cache shared by every mode below
+        get_races_file(memcard, args.profile)
+        slots = args.copy or args.move or args.swap
+        writes = args.pack or slots is not None
+        store = None
+        if (writes or args.undo or args.redo) and not args.no_snapshot:
+            from .snapshot import SnapshotStore, enable_snapshots, snapshot_path
+            store = SnapshotStore(snapshot_path(args.memcard))
+            enable_snapshots(memcard, store)
+        if args.archive is not None and args.library is not None:
+            raise Exception("Use either -A or -L, not both")
+        if args.undo or args.redo:
+            from .journal import Journal, journal_path
+            journal = Journal(journal_path(args.memcard))
+            entry = journal.undo(memcard, args.profile) if args.undo else journal.redo(memcard, args.profile)
+            for record in entry.records():
+                print(f"{'Undone' if args.undo else 'Redone'} {record.city}_{record.slot}")
+        elif writes and not args.no_journal:
+            from .journal import Journal, journal_path
+            profiles = {args.profile} if slots is None else {slot_ref(ref, args.profile).profile for ref in slots}
+            with Journal(journal_path(args.memcard)).track(memcard, *sorted(profiles)):
+                run_mode(memcard, args)
+        else:
+            run_mode(memcard, args)
+
+        racefile = get_races_file(memcard, args.profile)
+        memcard.close()
+        f.close()
+        if store is not None:
+            store.close()
+    if args.list_races or args.export is not None:
+        # After the close, so the cache has the image as flushed
+        store_race_cache(args.memcard, args.profile, racefile)
+
+    if args.stats:
+        print(cast(Stats, get_stats()).report(), file=sys.stderr)
+
+
+def run_mode(memcard: ps2mc, args: argparse.Namespace) -> None:
+    # Every mode but undo/redo, -p runs inside the undo journal
+    if args.archive is not None:
+        run_archive(memcard, args)
+    elif args.library is not None:
+        run_library(memcard, args)
+    elif args.extract:
+        if args.all:
+            directory = args.directory
+            if directory is None:
+                directory = "./extracted_races"
+                print("No output directory informed, using the default directory name! Use -d <directory> to set the output directory next time!")
+            extract_all(memcard, args.profile, directory)
+        else:
+            file = args.file[-1] if args.file else None
+            if file is None:
+                print("No output file informed, using the default file name! Use -f <file> to set the output file next time!")
+            if args.race_name is None:
+                raise Exception("No race name to be extracted informe! Use -n <race-name> next time!")
+            if args.directory is None:
+                args.directory = "./"
+            extract_from_name(memcard, args.profile, args.race_name, file, args.directory)
+    elif args.pack and args.directory is not None and args.file is None:
+        packed = pack_directory(memcard, args.profile, args.directory, args.store_at, args.on_collision)
+        for record in packed:
+            print(f"Packed {record.name} at {record.city}_{record.slot}")
+    elif args.pack:
+        if args.store_at is None:
+            raise Exception("Where to store the race? Use -s <position>")
+        if args.file is None:
+            raise Exception("No input race file informed! Use -f <file> next time when unpacking")
+        if len(args.store_at) != len(args.file):
+            raise Exception("Each race file needs its own slot! Use one -s <position> for every -f <file>")
+        if args.rename is not None and len(args.rename) != len(args.file):
+            raise Exception("When renaming a batch, use one -R <name> for every -f <file>")
+        for file in args.file:
+            if not os.path.exists(file):
+                raise Exception(f"Race {file} does not exist or the path is wrong!")
+        for store_at in args.store_at:
+            if store_at < 0 or store_at > 14:
                 raise Exception("Can't store race at this location! You can only store stuff between 0..14")
-            if args.rename is not None:
-                rename_bytes = args.rename.encode('ascii')
+        renames = args.rename if args.rename is not None else [None] * len(args.file)
+        for rename in renames:
+            if rename is not None:
+                rename_bytes = rename.encode('ascii')
                 if len(rename_bytes) > MAX_NAME:
                     raise Exception("Can't have a race name bigger than 17 characters")
 
-            pack(memcard, args.profile, args.file, args.store_at, args.rename)
-        elif args.list_races:
-            print_info(memcard, args.profile)
+        pack_many(memcard, args.profile, zip(args.file, args.store_at, renames))
+    elif args.copy or args.move or args.swap:
+        src, dst = (slot_ref(ref, args.profile) for ref in args.copy or args.move or args.swap)
+        rename = args.rename[-1] if args.rename else None
+        if args.swap:
+            written = swap_slots(memcard, src, dst)
+        elif args.move:
+            written = move_slot(memcard, src, dst, rename)
+        else:
+            written = copy_slot(memcard, src, dst, rename)
+        for profile, records in written.items():
+            for record in records:
+                print(f"{profile}:{record.city}_{record.slot} is now {record.name or 'empty'}")
+    elif args.list_races:
+        print_info(memcard, args.profile)
+    elif args.export:
+        from .grid import race_table, export_race_table
+        racefile = get_races_file(memcard, args.profile)
+        export_race_table(args.export, race_table([racefile], profiles=[args.profile]), racefiles=[racefile])
 
-        memcard.close()
-        f.close()
 
+def slot_ref(text: str, profile: str) -> SlotRef:
+    # [PROFILE:]CITY_SLOT, the profile given on the command line by default
+    if ":" in text:
+        profile, text = text.rsplit(":", 1)
+    city, _, slot = text.upper().partition("_")
+    if city not in CITIES_ADDR or not slot.isdigit() or not 0 <= int(slot) < RACE_QTD:
+        raise Exception(f"{text} is not a race slot! Use <city>_<slot>, like DET_5")
+    return SlotRef(profile, city, int(slot))
+
+
+def run_archive(memcard: ps2mc, args: argparse.Namespace) -> None:
+    from .archive import RaceArchive, archive_races, load_archive_batch
+
+    if args.extract:
+        if not args.all and args.race_name is None:
+            raise Exception("Which races go to the archive? Use -a for all of them or -n <race-name>")
+        selectors = None if args.all else [args.race_name]
+        if args.archive == "-":
+            archive_races(memcard, args.profile, sys.stdout.buffer, selectors)
+            sys.stdout.buffer.flush()
+        else:
+            with open(args.archive, "wb") as out:
+                count = archive_races(memcard, args.profile, out, selectors)
+            print(f"{count} race(s) archived at {args.archive}")
+    elif args.pack:
+        items = None
+        if args.race_name is not None:
+            store_at = args.store_at[-1] if args.store_at else None
+            rename = args.rename[-1] if args.rename else None
+            items = [(args.race_name, store_at, rename)]
+        elif args.store_at or args.rename:
+            raise Exception("Use -n <race-name> to pick the archived race that -s/-R apply to")
+
+        if args.archive == "-":
+            # Random access needs a seekable file, a pipe is read whole
+            archive = RaceArchive(io.BytesIO(sys.stdin.buffer.read()), "<stdin>")
+        else:
+            archive = RaceArchive(open(args.archive, "rb"), args.archive)
+        with archive:
+            batch = load_archive_batch(archive, items)
+        packed = pack_batch(memcard, args.profile, batch)
+        print(f"{len(packed)} race(s) packed from {args.archive}")
+    else:
+        raise Exception("-A only works with -x or -p")
+
+
+def run_library(memcard: ps2mc, args: argparse.Namespace) -> None:
+    from .library import Library, add_to_library, pack_from_library
+
+    with Library(args.library) as library:
+        if args.extract:
+            if not args.all and args.race_name is None:
+                raise Exception("Which races go to the library? Use -a for all of them or -n <race-name>")
+            selectors = None if args.all else [args.race_name]
+            known = len(library)
+            hashes = add_to_library(library, memcard, args.profile, os.path.abspath(args.memcard), selectors)
+            print(f"{len(hashes)} race(s) added to {args.library}, {len(library) - known} of them new")
+        elif args.pack:
+            if args.race_name is None:
+                raise Exception("Which race to pull from the library? Use -n <race-name-or-hash>")
+            store_at = args.store_at[-1] if args.store_at else None
+            rename = args.rename[-1] if args.rename else None
+            for record in pack_from_library(memcard, args.profile, library, [(args.race_name, store_at, rename)]):
+                print(f"Packed {record.name} at {record.city}_{record.slot}")
+        else:
+            raise Exception("-L only works with -x or -p")
+
+
+def library_main(argv: list[str]) -> int:
+    from .library import Library
+
+    parser = argparse.ArgumentParser(
+        prog='Racist library',
+        description='Search the races stored in a race library',
+    )
+    parser.add_argument('library', help='Race library file')
+    parser.add_argument('-s', '--search', default='%', help='Only names matching this pattern, %% matches anything (default: all)')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.library):
+        print(f"{args.library}: no such race library", file=sys.stderr)
+        return 1
+    with Library(args.library) as library:
+        for race in library.search(args.search):
+            print("\t".join((race.hash[:16], race.name, race.city, race.card, race.profile, str(race.slot))))
+    return 0
+
+
+def snapshots_main(argv: list[str]) -> int:
+    import time
+    from .snapshot import SnapshotStore, snapshot_path
+
+    parser = argparse.ArgumentParser(
+        prog='Racist snapshots',
+        description='List, restore or prune the snapshots taken before every write to a memory card',
+    )
+    parser.add_argument('memcard', help='.ps2 Memory card file')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('-r', '--restore', type=int, help='Bring the memory card back to this snapshot')
+    group.add_argument('--prune', type=int, metavar='COUNT', help='Keep only the last COUNT snapshots')
+    args = parser.parse_args(argv)
+
+    path = snapshot_path(args.memcard)
+    if not os.path.exists(path):
+        print(f"{args.memcard}: no snapshots", file=sys.stderr)
+        return 1
+    with SnapshotStore(path) as store:
+        if args.restore is not None:
+            with open(args.memcard, "r+b") as f:
+                written = store.restore(f, args.restore)
+            print(f"{args.memcard} restored to snapshot {args.restore}, {written} cluster(s) written")
+        elif args.prune is not None:
+            print(f"{store.prune(args.prune)} snapshot(s) pruned")
+        else:
+            for snapshot in store.snapshots():
+                taken = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(snapshot.taken))
+                print(f"{snapshot.id}\t{taken}\t{snapshot.profile or '-'}\t{snapshot.changed} cluster(s)")
+    return 0
+
+
+def index_main(argv: list[str]) -> int:
+    from .search import SearchIndex, update_index
+
+    parser = argparse.ArgumentParser(
+        prog='Racist index',
+        description='Index the races of every memory card under some directories and search them',
+    )
+    parser.add_argument('index', help='Search index file, created if missing')
+    parser.add_argument('memcards', nargs='*', help='.ps2 Memory card files or directories to index, searched recursively')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('-s', '--search', help='Slots holding a race named like this, %% matches anything')
+    group.add_argument('-H', '--hash', help='Slots holding the race with this hash, as listed by racist library')
+    parser.add_argument('-j', '--jobs', type=int, help='Worker processes (default: one per core)')
+    args = parser.parse_args(argv)
+
+    if not args.memcards and not os.path.exists(args.index):
+        print(f"{args.index}: no such search index", file=sys.stderr)
+        return 1
+    with SearchIndex(args.index) as index:
+        if args.memcards:
+            update = update_index(index, args.memcards, args.jobs)
+            print(f"{update.scanned} card(s) scanned, {update.unchanged} unchanged, {update.removed} removed, {update.failed} failed", file=sys.stderr)
+            for card, error in index.errors():
+                print(f"{card}\terror: {error}", file=sys.stderr)
+        hits = index.find_name(args.search) if args.search is not None else index.find_hash(args.hash) if args.hash is not None else []
+        for hit in hits:
+            print("\t".join((hit.hash[:16], hit.name, hit.city, str(hit.slot), hit.card, hit.profile)))
+    return 0
+
+
+def fleet_main(argv: list[str]) -> int:
+    from .fleet import find_memcards, run_fleet
+
+    parser = argparse.ArgumentParser(
+        prog='Racist fleet',
+        description='Run profiles/list/extract/export jobs over many memory cards, one worker process per card at a time',
+    )
+    parser.add_argument('memcards', nargs='+', help='.ps2 Memory card files or directories holding them')
+    parser.add_argument('-P', '--profiles', default='*', help='Only profiles matching this pattern, like "RACER*" (default: all)')
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('-D', '--list_profiles', action='store_true', help='List every profile and its save size without reading the races')
+    group.add_argument('-l', '--list_races', action='store_true', help='List races of every profile as tab separated lines')
+    group.add_argument('-x', '--extract', action='store_true', help='Extract all races to <directory>/<card path below the folder shared by the cards>/<profile>/')
+    group.add_argument('-e', '--export', help='Export one race table of every profile to a .csv, .json or .npz file')
+    parser.add_argument('-d', '--directory', default='./extracted_races', help='Output directory for -x')
+    parser.add_argument('-j', '--jobs', type=int, help='Worker processes (default: one per core)')
+    args = parser.parse_args(argv)
+
+    cards = find_memcards(args.memcards)
+    action = "profiles" if args.list_profiles else "list" if args.list_races else "extract" if args.extract else "export"
+
+    failed = 0
+    exported = []
+    for result in run_fleet(cards, args.profiles, action, args.directory, args.jobs):
+        if result.error is not None:
+            failed += 1
+            print(f"{result.card}\t{result.profile or '-'}\terror: {result.error}", file=sys.stderr)
+        if action == "profiles" and result.profile is not None:
+            print(f"{result.card}\t{result.profile}\t{result.size if result.size is not None else 'no save'}")
+        elif action == "list" and result.races is not None:
+            for race in result.races:
+                print(f"{result.card}\t{result.profile}\t{race.city}\t{race.slot}\t{race.name}")
+        elif action == "extract" and result.profile is not None:
+            print(f"{result.card}\t{result.profile}\t{result.extracted} races extracted")
+        elif action == "export" and result.racefile is not None:
+            exported.append(result)
 
+    if action == "export":
+        from .grid import race_table, export_race_table
+        exported.sort(key=lambda result: (result.card, result.profile))
+        racefiles = [result.racefile for result in exported]
+        table = race_table(racefiles, [result.card for result in exported], [result.profile for result in exported])
+        export_race_table(args.export, table, racefiles=racefiles)
 
+    return 1 if failed else 0
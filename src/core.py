@@ -1,10 +1,13 @@
-import argparse
-from pathlib import Path
-from mymcplus.ps2mc import ps2mc
+from mymcplus.ps2mc import (
+    ps2mc, file_not_found, path_not_found, unpack_dirent,
+    DF_DIR, DF_EXISTS, PS2MC_DIRENT_LENGTH, PS2MC_FAT_ALLOCATED_BIT, PS2MC_FAT_CHAIN_END
+)
+from weakref import WeakKeyDictionary
+from typing import Callable, Iterable, NamedTuple, cast
 import struct
 import os
-from math import floor
-import re
+import threading
+import time
 
 RACE_BASE = 0x4
 CITIES = ["SD", "ATL", "DET", "TOK"]
@@ -22,6 +25,314 @@ VERSION = 1
 MAGIC   = b'RATO'
 MAX_NAME = 17
 
+PROFILE_PREFIX = "BASLUS-21355"
+
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "racist")
+
+# Images that passed a full check, so an unchanged card isn't checked again
+CHECK_CACHE = os.path.join(CACHE_DIR, "checks.json")
+
+# Race tables of the last cards opened, shown before the card is read again
+RACE_CACHE = os.path.join(CACHE_DIR, "races.json")
+
+# Characters kept from race names when building .mc3race file names
+FILENAME_CHARS = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789 _-")
+
+CITY_NAMES = {
+    "SD": "San Diego",
+    "ATL": "Atlanta",
+    "DET": "Detroit",
+    "TOK": "Tokyo",
+}
+
+class Stats:
+    """Counters and timings of core operations, collected while enable_stats() is on."""
+
+    def __init__(self):
+        self.counters: dict[str, int] = {}
+        self.times: dict[str, float] = {}
+        self.calls: dict[str, int] = {}
+        # Extraction writes files from a thread pool
+        self._lock = threading.Lock()
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_time(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.times[name] = self.times.get(name, 0.0) + seconds
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.times.clear()
+            self.calls.clear()
+
+    def snapshot(self) -> dict[str, dict]:
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "timings": {
+                    name: {"calls": self.calls[name], "total_ms": round(seconds * 1000, 3)}
+                    for name, seconds in self.times.items()
+                },
+            }
+
+    def report(self) -> str:
+        snapshot = self.snapshot()
+        lines = [f"{name:<24} {value:>12}" for name, value in sorted(snapshot["counters"].items())]
+        lines += [
+            f"{name:<24} {timing['total_ms']:>9.2f} ms in {timing['calls']} call(s)"
+            for name, timing in sorted(snapshot["timings"].items())
+        ]
+        return "\n".join(lines)
+
+class _Timed:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        if _stats is not None:
+            _stats.add_time(self.name, time.perf_counter() - self.start)
+
+class _NotTimed:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+_NOT_TIMED = _NotTimed()
+
+# None unless instrumentation was asked for, so the hot paths only pay for a global lookup
+_stats: Stats | None = None
+
+def enable_stats() -> Stats:
+    global _stats
+    if _stats is None:
+        _stats = Stats()
+    return _stats
+
+def disable_stats() -> Stats | None:
+    global _stats
+    stats, _stats = _stats, None
+    return stats
+
+def get_stats() -> Stats | None:
+    return _stats
+
+def _count(name: str, n: int = 1) -> None:
+    if _stats is not None:
+        _stats.count(name, n)
+
+def _timed(name: str) -> _Timed | _NotTimed:
+    return _NOT_TIMED if _stats is None else _Timed(name)
+
+class CachedRacefile:
+    """file01 of one profile as read in this session, plus the views built over it."""
+    __slots__ = ("racefile", "table", "index")
+
+    def __init__(self, racefile: bytes):
+        self.racefile = racefile
+        self.table: RaceTable | None = None
+        self.index: RaceIndex | None = None
+
+# Racefiles already read in this session, per open memory card and profile.
+# Keyed weakly so closing and dropping a ps2mc also drops its racefiles.
+_racefile_cache: "WeakKeyDictionary[ps2mc, dict[str, CachedRacefile]]" = WeakKeyDictionary()
+
+class ProfileEntry(NamedTuple):
+    profile: str
+    # Size and first cluster of file01, None when the save has no racefile
+    size: int | None
+    cluster: int | None
+
+# Profiles of every open memory card, found with one walk of the root directory
+_profile_catalog: "WeakKeyDictionary[ps2mc, dict[str, ProfileEntry]]" = WeakKeyDictionary()
+
+# Guards both caches above, the GUI reads and writes cards from a pool per card.
+# Never held while the card itself is read or written.
+_cache_lock = threading.Lock()
+
+# Called as hook(memcard, profile) right before write_races_file changes a card
+_write_hooks: list[Callable[[ps2mc, str], None]] = []
+
+def add_write_hook(hook: Callable[[ps2mc, str], None]) -> None:
+    if hook not in _write_hooks:
+        _write_hooks.append(hook)
+
+def remove_write_hook(hook: Callable[[ps2mc, str], None]) -> None:
+    if hook in _write_hooks:
+        _write_hooks.remove(hook)
+
+class RaceRecord(NamedTuple):
+    name: str
+    offset: int
+    city: str
+    slot: int
+
+class RaceSlot:
+    """One race block, viewed in place inside a racefile buffer."""
+    __slots__ = ("_view", "offset", "_dirty")
+
+    def __init__(self, view: memoryview, offset: int, dirty: set[int] | None = None):
+        self._view = view
+        self.offset = offset
+        # Offsets of the slots written since the table was built, shared by the whole table
+        self._dirty = dirty
+
+    @property
+    def name(self) -> str:
+        if _stats is not None:
+            _stats.count("slot.decodes")
+        return str(self._view[0x02 : 0x02 + MAX_NAME], "ascii", errors="ignore").rstrip('\x00')
+
+    @name.setter
+    def name(self, value: str) -> None:
+        name_bytes = value.encode('ascii')
+        if len(name_bytes) > MAX_NAME:
+            raise Exception(f"Can't have a race name bigger than {MAX_NAME} characters")
+        self._view[0x02 : 0x02 + MAX_NAME] = name_bytes.ljust(MAX_NAME, b'\x00')
+        if self._dirty is not None:
+            self._dirty.add(self.offset)
+
+    @property
+    def block(self) -> memoryview:
+        return self._view
+
+    @block.setter
+    def block(self, value: bytes) -> None:
+        if len(value) != RACE_SIZE:
+            raise ValueError("Invalid race block size")
+        self._view[:] = value
+        if self._dirty is not None:
+            self._dirty.add(self.offset)
+
+    @property
+    def city(self) -> str:
+        return get_city_from_race_loc(self.offset)
+
+    @property
+    def slot(self) -> int:
+        return get_city_and_code_from_race_loc(self.offset)[1]
+
+    def record(self) -> RaceRecord:
+        city, code = get_city_and_code_from_race_loc(self.offset)
+        return RaceRecord(self.name, self.offset, city, code)
+
+class RaceTable:
+    """The 60 race slots of a racefile as views into one shared buffer.
+
+    Built over a bytearray the slots are writable and writes land straight in
+    the buffer, built over bytes they are read only."""
+    __slots__ = ("buffer", "dirty", "_races")
+
+    def __init__(self, racefile: bytes | bytearray):
+        if len(racefile) < RACE_BASE + len(CITIES) * RACE_QTD * RACE_SIZE:
+            raise ValueError("Racefile is too small to hold every race slot")
+        self.buffer = racefile
+        self.dirty: set[int] = set()
+        view = memoryview(racefile)
+        self._races = [
+            RaceSlot(view[race_loc : race_loc + RACE_SIZE], race_loc, self.dirty)
+            for race_loc in (get_offset_from_city_and_code(city, code) for city, code in all_race_slots())
+        ]
+
+    def __iter__(self):
+        return iter(self._races)
+
+    def __len__(self) -> int:
+        return len(self._races)
+
+    def __getitem__(self, i: int) -> RaceSlot:
+        return self._races[i]
+
+    def at(self, city: str, slot: int) -> RaceSlot:
+        if city not in CITIES_ADDR or not 0 <= slot < RACE_QTD:
+            raise Exception(f"Race {city}_{slot} not found in memory card!")
+        return self._races[CITIES.index(city) * RACE_QTD + slot]
+
+    def at_offset(self, race_loc: int) -> RaceSlot:
+        city, code = get_city_and_code_from_race_loc(race_loc)
+        return self.at(city, code)
+
+    def in_city(self, city: str) -> list[RaceSlot]:
+        start = CITIES.index(city) * RACE_QTD
+        return self._races[start : start + RACE_QTD]
+
+    def dirty_ranges(self) -> list[tuple[int, int]]:
+        """(offset, length) of the bytes written through the slots, adjacent slots merged."""
+        return merge_ranges((race_loc, RACE_SIZE) for race_loc in self.dirty)
+
+class RaceIndex:
+    """Name and (city, slot) lookups over the 60 race slots of a racefile."""
+
+    def __init__(self, racefile: bytes | RaceTable):
+        table = racefile if isinstance(racefile, RaceTable) else RaceTable(racefile)
+        self._by_slot: dict[tuple[str, int], RaceRecord] = {}
+        self._by_name: dict[str, list[RaceRecord]] = {}
+        with _timed("decode.index"):
+            for race in table:
+                self._add(race.record())
+
+    def _add(self, record: RaceRecord) -> None:
+        self._by_slot[(record.city, record.slot)] = record
+        records = self._by_name.setdefault(record.name, [])
+        records.append(record)
+        records.sort(key=lambda r: r.offset)
+
+    def _remove(self, record: RaceRecord) -> None:
+        records = self._by_name[record.name]
+        records.remove(record)
+        if not records:
+            del self._by_name[record.name]
+
+    @staticmethod
+    def _key(name: str) -> str | None:
+        # Names longer than a name field can't be on the card, match what the game would store.
+        # Non ASCII names can't be on it at all.
+        try:
+            return name.encode('ascii')[:MAX_NAME].decode('ascii')
+        except UnicodeEncodeError:
+            return None
+
+    def find(self, name: str) -> RaceRecord | None:
+        records = self._by_name.get(self._key(name))
+        return records[0] if records else None
+
+    def find_all(self, name: str) -> list[RaceRecord]:
+        return list(self._by_name.get(self._key(name), ()))
+
+    def at(self, city: str, slot: int) -> RaceRecord:
+        record = self._by_slot.get((city, slot))
+        if record is None:
+            raise Exception(f"Race {city}_{slot} not found in memory card!")
+        return record
+
+    def copy(self) -> "RaceIndex":
+        index = RaceIndex.__new__(RaceIndex)
+        index._by_slot = dict(self._by_slot)
+        index._by_name = {name: list(records) for name, records in self._by_name.items()}
+        return index
+
+    def update(self, race: RaceSlot) -> None:
+        # Re-read the name of a slot that was just overwritten
+        record = race.record()
+        self._remove(self._by_slot[(record.city, record.slot)])
+        self._add(record)
+
+    def __iter__(self):
+        return iter(sorted(self._by_slot.values(), key=lambda r: r.offset))
+
 def get_city_from_race_loc(race_loc: int) -> str:
     race_index = (race_loc - RACE_BASE) // RACE_SIZE
     city_index = race_index // RACE_QTD
@@ -30,24 +341,19 @@ def get_city_from_race_loc(race_loc: int) -> str:
 def get_offset_from_city_and_code(city: str, code: int) -> int:
     return CITIES_ADDR[city] + code * RACE_SIZE
 
+def get_city_and_code_from_race_loc(race_loc: int) -> tuple[str, int]:
+    in_grid = RACE_BASE <= race_loc < RACE_BASE + len(CITIES) * RACE_QTD * RACE_SIZE
+    if not in_grid or (race_loc - RACE_BASE) % RACE_SIZE != 0:
+        raise Exception(f"Offset 0x{race_loc:04X} is not the start of a race slot!")
+    city = get_city_from_race_loc(race_loc)
+    return city, (race_loc - CITIES_ADDR[city]) // RACE_SIZE
+
 def extract_from_name(memcard: ps2mc, profile: str, name: str, filename: str | None, directory: str = './') -> None:
-    racefile = get_races_file(memcard, profile)
-    race_name = name.encode(encoding='ascii')
-    race_name = race_name[:MAX_NAME]
-    race_loc = racefile.find(race_name) - 0x2
-    if race_loc < 0:
-        raise Exception(f"Race {name} not found in memory card!")
+    race_loc = resolve_race_selector(get_race_index(memcard, profile), name)
     extract(memcard, profile, race_loc, filename, directory)
 
-def get_all_race_info(racefile) -> list[tuple[str, int, str, int]]:
-    racenames = []
-    for city in CITIES:
-        for code in range(RACE_QTD):
-            race_loc = get_offset_from_city_and_code(city, code)
-            race = racefile[race_loc : race_loc + RACE_SIZE]
-            name = race[0x02 : 0x02 + MAX_NAME].decode("ascii", errors="ignore").rstrip('\x00')
-            racenames.append((name, race_loc, city, code))
-    return racenames
+def get_all_race_info(racefile) -> list[RaceRecord]:
+    return [race.record() for race in RaceTable(racefile)]
 
 def extract(
     memcard: ps2mc,
@@ -57,28 +363,28 @@ def extract(
     directory: str = "./"
 ) -> None:
 
-    racefile = get_races_file(memcard, profile)
+    race = get_race_table(memcard, profile).at_offset(race_loc)
 
+    filename, contents = build_race_file(race)
+
+    # Write file safely
+    os.makedirs(directory, exist_ok=True)
+    filepath = os.path.join(directory, filename)
+
+    _write_file(filepath, contents)
+
+def build_race_file(race: RaceSlot) -> tuple[str, bytes]:
     # Determine city
-    city_str = get_city_from_race_loc(race_loc)        # e.g. "ATL"
+    city_str = race.city        # e.g. "ATL"
     city_bytes = city_str.encode("ascii").ljust(8, b"\x00")
 
-    # Extract race block
-    race = racefile[race_loc:race_loc + RACE_SIZE]
-    if len(race) != RACE_SIZE:
-        raise ValueError("Invalid race block size")
-
     # Build header
     header = struct.pack(">4sI8s", MAGIC, VERSION, city_bytes)
 
-    filename = (
-        race[0x2:0x2 + MAX_NAME]
-        .decode("ascii", errors="ignore")
-        .replace("\x00", "")
-    )
+    filename = race.name.replace("\x00", "")
 
     base, ext = os.path.splitext(filename)
-    base = re.sub(r"[^A-Za-z0-9 _-]", "", base)
+    base = "".join(c for c in base if c in FILENAME_CHARS)
 
     
     if not base:
@@ -92,50 +398,170 @@ def extract(
     else:
         filename = f"{base}{ext}"
 
-    # Write file safely
+    return filename, b"".join((header, race.block))
+
+# A race name, a (city, slot) pair or a raw racefile offset
+RaceSelector = str | tuple[str, int] | int
+
+class ExtractResult(NamedTuple):
+    selector: RaceSelector
+    path: str | None
+    error: Exception | None
+
+def resolve_race_selector(index: RaceIndex, selector: RaceSelector) -> int:
+    if isinstance(selector, str):
+        record = index.find(selector)
+        if record is None:
+            raise Exception(f"Race {selector} not found in memory card!")
+        return record.offset
+    if isinstance(selector, tuple):
+        city, code = selector
+        return index.at(city, code).offset
+    get_city_and_code_from_race_loc(selector)
+    return selector
+
+def select_race_blocks(memcard: ps2mc, profile: str, selectors: Iterable[RaceSelector] | None = None) -> list[RaceSlot]:
+    """The slots picked by selectors, every slot when selectors is None."""
+    table = get_race_table(memcard, profile)
+    index = get_race_index(memcard, profile)
+    if selectors is None:
+        selectors = all_race_slots()
+    return [table.at_offset(resolve_race_selector(index, selector)) for selector in selectors]
+
+def extract_many(
+    memcard: ps2mc,
+    profile: str,
+    selectors: Iterable[RaceSelector],
+    directory: str,
+    max_workers: int | None = None,
+    progress: Callable[[int, int], None] | None = None
+) -> list[ExtractResult]:
+    # progress(done, total) is called as files land on disk, raising from it stops the extraction
+    table = get_race_table(memcard, profile)
+    index = get_race_index(memcard, profile)
+    selectors = list(selectors)
+    results: list[ExtractResult | None] = [None] * len(selectors)
+
+    # Build every payload up front. Races sharing a file name, like empty slots or
+    # duplicate names, get their slot added to it so none of them is lost.
+    payloads: dict[str, bytes] = {}
+    targets: dict[int, str] = {}
+    for i, selector in enumerate(selectors):
+        try:
+            race = table.at_offset(resolve_race_selector(index, selector))
+            filename, contents = build_race_file(race)
+            filepath = os.path.join(directory, filename)
+            if filepath in payloads:
+                ext = f".{race.city.lower()}.mc3race"
+                filepath = os.path.join(directory, f"{filename[:-len(ext)]}_{race.slot}{ext}")
+                if filepath in payloads:
+                    raise Exception(f"Race {race.city}_{race.slot} would overwrite {filepath}!")
+        except Exception as e:
+            results[i] = ExtractResult(selector, None, e)
+            continue
+        payloads[filepath] = contents
+        targets[i] = filepath
+
     os.makedirs(directory, exist_ok=True)
-    filepath = os.path.join(directory, filename)
+    errors: dict[str, Exception] = {}
+    # Deferred, the thread pool machinery is only worth importing once there are files to write
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {pool.submit(_write_file, path, contents): path for path, contents in payloads.items()}
+        for done, future in enumerate(as_completed(futures), 1):
+            error = future.exception()
+            if error is not None:
+                errors[futures[future]] = cast(Exception, error)
+            if progress is not None:
+                progress(done, len(futures))
+    finally:
+        # Drops the writes that did not start yet if progress raised
+        pool.shutdown(cancel_futures=True)
 
-    with open(filepath, "wb") as f:
-        f.write(header)
-        f.write(race)
+    for i, path in targets.items():
+        error = errors.get(path)
+        results[i] = ExtractResult(selectors[i], None if error else path, error)
+
+    return cast(list[ExtractResult], results)
+
+def _write_file(path: str, contents: bytes) -> None:
+    with _timed("files.write"):
+        with open(path, "wb") as f:
+            f.write(contents)
+    _count("files.written")
+    _count("files.bytes_written", len(contents))
+
+def all_race_slots() -> list[tuple[str, int]]:
+    return [(city, code) for city in CITIES for code in range(RACE_QTD)]
 
 def extract_all(memcard: ps2mc, profile: str, directory: str) -> None:
-    dir_path = Path(directory)
-    dir_path.mkdir(parents=True, exist_ok=True)
-    for city in CITIES:
-        for code in range(RACE_QTD):
-            extract(memcard, profile, get_offset_from_city_and_code(city, code), directory=str(dir_path)+'/')
+    results = extract_many(memcard, profile, all_race_slots(), directory)
+    failed = [result for result in results if result.error is not None]
+    if failed:
+        city, code = cast(tuple[str, int], failed[0].selector)
+        raise Exception(f"Failed to extract {len(failed)} race(s), first was {city}_{code}: {failed[0].error}")
 
 def print_info(memcard: ps2mc, profile: str) -> None:
-    racefile = get_races_file(memcard, profile)
-    info = get_all_race_info(racefile)
-    sd_races = [race for race in info if race [2] == 'SD']
-    atl_races = [race for race in info if race[2] == 'ATL']
-    det_races = [race for race in info if race[2] == 'DET']
-    tok_races = [race for race in info if race[2] == 'TOK']
-
-    print("-- San Diego --")
-    for race in sd_races:
-        print(f'"{race[0]}"')
-    print("-- Atlanta --")
-    for race in atl_races:
-        print(f'"{race[0]}"')
-    print("-- Detroit --")
-    for race in det_races:
-        print(f'"{race[0]}"')
-    print("-- Tokyo --")
-    for race in tok_races:
-        print(f'"{race[0]}"')
+    print_races([race.record() for race in get_race_table(memcard, profile)])
+
+def print_races(races: Iterable[RaceRecord]) -> None:
+    races = list(races)
+    for city in CITIES:
+        print(f"-- {CITY_NAMES[city]} --")
+        for race in races:
+            if race.city == city:
+                print(f'"{race.name}"')
 
 def get_race_names(racefile: bytes) -> list[str]:
-    info = get_all_race_info(racefile)
-    return [race[0] for race in info]
+    return [race.name for race in RaceTable(racefile)]
+
+# A .mc3race file, the slot 0..14 to store it at and an optional new name
+PackItem = tuple[str, int, str | None]
+
+class PackBatchEntry(NamedTuple):
+    filename: str
+    city: str
+    position: int
+    name: str
+    block: bytes
 
 def pack(memcard: ps2mc, profile: str, filename: str, position: int, new_name: str | None = None) -> None:
+    pack_many(memcard, profile, [(filename, position, new_name)])
+
+def pack_many(memcard: ps2mc, profile: str, races: Iterable[PackItem]) -> list[RaceRecord]:
+    """Pack a batch of races with a single write, returns the slots it changed."""
+    # Read every input race file before touching the memory card
+    return pack_batch(memcard, profile, load_pack_batch(races))
+
+def pack_batch(memcard: ps2mc, profile: str, batch: list[PackBatchEntry]) -> list[RaceRecord]:
+    # Load memory card racefile into a buffer we can write to
+    table = RaceTable(bytearray(get_races_file(memcard, profile)))
+
+    # Nothing gets written unless the whole batch is fine
+    errors = check_pack_batch(get_race_index(memcard, profile), batch)
+    if errors:
+        raise Exception("\n".join(errors))
+
+    packed = []
+    for entry in batch:
+        race = table.at(entry.city, entry.position)
+        if race.name == entry.name:
+            print(f"Replacing race at slot {entry.position}")
+        # Copy race block into memory card
+        race.block = entry.block
+        packed.append(race.record())
+
+    # Write updated racefile back to memory card, once for the whole batch and only the slots that changed
+    write_races_file(memcard, profile, table.buffer, table.dirty_ranges())
+    return packed
+
+def read_race_file(filename: str) -> tuple[str, bytes]:
     # Read input race file
-    with open(filename, 'rb') as f:
-        input_bytes = bytearray(f.read())
+    with _timed("files.read"):
+        with open(filename, 'rb') as f:
+            input_bytes = f.read()
+    _count("files.read")
 
     if input_bytes[:0x4] != MAGIC:
         raise Exception("Not a valid race file!")
@@ -143,57 +569,643 @@ def pack(memcard: ps2mc, profile: str, filename: str, position: int, new_name: s
     # Extract city from header
     city_bytes = input_bytes[0x8:0xF]
     city = city_bytes.decode('ascii').strip('\0')
+    if city not in CITIES_ADDR:
+        raise Exception(f"Unknown city {city} in race file {filename}!")
 
-    # Load memory card racefile
-    racefile = bytearray(get_races_file(memcard, profile))
-    race_loc = get_offset_from_city_and_code(city, position)
-    if race_loc == -1:
-        raise Exception(f"Race {city}_{position} not found in memory card!")
+    block = input_bytes[0x10 : 0x10 + RACE_SIZE]
+    if len(block) != RACE_SIZE:
+        raise ValueError("Invalid race block size")
+
+    return city, block
+
+def make_batch_entry(filename: str, city: str, position: int, block: bytes, new_name: str | None = None) -> PackBatchEntry:
+    """A race block going to slot position, wherever it was read from."""
+    if not 0 <= position < RACE_QTD:
+        raise Exception(f"Can't store race at slot {position}! You can only store stuff between 0..{RACE_QTD - 1}")
 
-    # Determine the name to write / check duplicates
+    # Overwrite race name if a new name is given
     if new_name is not None:
-        current_race_name = new_name
+        block = rename_block(block, new_name)
+
+    return PackBatchEntry(filename, city, position, get_race_name(block, 0), block)
+
+def load_pack_batch(races: Iterable[PackItem]) -> list[PackBatchEntry]:
+    batch = []
+    for filename, position, new_name in races:
+        city, block = read_race_file(filename)
+        batch.append(make_batch_entry(filename, city, position, block, new_name))
+    return batch
+
+def rename_block(block: bytes, new_name: str) -> bytes:
+    name_bytes = new_name.encode('ascii')
+    if len(name_bytes) > MAX_NAME:
+        raise Exception(f"Can't have a race name bigger than {MAX_NAME} characters")
+    return block[:0x02] + name_bytes.ljust(MAX_NAME, b'\x00') + block[0x02 + MAX_NAME:]
+
+def check_pack_batch(index: RaceIndex, batch: list[PackBatchEntry]) -> list[str]:
+    errors = []
+
+    targets: dict[int, PackBatchEntry] = {}
+    for entry in batch:
+        race_loc = get_offset_from_city_and_code(entry.city, entry.position)
+        if race_loc in targets:
+            errors.append(f"{entry.filename} and {targets[race_loc].filename} both go to {entry.city}_{entry.position}!")
+        targets[race_loc] = entry
+
+    # Compare against the names the racefile will hold once the batch is applied
+    batch_by_name: dict[str, list[int]] = {}
+    for race_loc, entry in targets.items():
+        batch_by_name.setdefault(entry.name, []).append(race_loc)
+
+    for race_loc, entry in targets.items():
+        # Empty slots have no name to collide with
+        if not entry.name:
+            continue
+        dup_batch = [loc for loc in batch_by_name[entry.name] if loc != race_loc]
+        if dup_batch:
+            errors.append(f"{entry.filename} and {targets[dup_batch[0]].filename} are both named '{entry.name}'!")
+            continue
+        for record in index.find_all(entry.name):
+            if record.offset != race_loc and record.offset not in targets:
+                errors.append(f"There's a race with this exact same name at {record.city}_{record.slot}! Use -R to rename {entry.filename}.")
+                break
+
+    return errors
+
+# What a directory import does with a race whose name is already taken
+COLLISION_POLICIES = ("error", "skip", "replace", "rename")
+
+def find_race_files(directory: str) -> list[str]:
+    if not os.path.isdir(directory):
+        raise Exception(f"Directory {directory} does not exist!")
+    return sorted(
+        os.path.join(directory, filename)
+        for filename in os.listdir(directory)
+        if filename.lower().endswith(".mc3race")
+    )
+
+def unique_race_name(name: str, taken: Iterable[str]) -> str:
+    taken = set(taken)
+    n = 2
+    while True:
+        suffix = f" {n}"
+        candidate = name.encode('ascii')[:MAX_NAME - len(suffix)].decode('ascii') + suffix
+        if candidate not in taken:
+            return candidate
+        n += 1
+
+def plan_directory_import(
+    table: RaceTable,
+    filenames: Iterable[str],
+    slots: Iterable[int] | None = None,
+    on_collision: str = "error",
+) -> list[PackBatchEntry]:
+    """
+    Pick a slot for every race file in its own city. Races go to the given slots,
+    the same ones in every city, or to the empty slots of each city when there
+    are none. on_collision is one of COLLISION_POLICIES.
+    """
+    if on_collision not in COLLISION_POLICIES:
+        raise Exception(f"Unknown collision policy {on_collision}! Use one of {', '.join(COLLISION_POLICIES)}")
+
+    if slots is None:
+        available = {city: [race.offset for race in table.in_city(city) if not race.name] for city in CITIES}
     else:
-        # Read name from input file race block
-        current_race_name = input_bytes[0x10 + 0x02 : 0x10 + 0x02 + MAX_NAME].decode('ascii', errors='ignore').rstrip('\x00')
+        slots = list(dict.fromkeys(slots))
+        for slot in slots:
+            if not 0 <= slot < RACE_QTD:
+                raise Exception(f"Can't store race at slot {slot}! You can only store stuff between 0..{RACE_QTD - 1}")
+        available = {city: [get_offset_from_city_and_code(city, slot) for slot in slots] for city in CITIES}
 
-    # Check for duplicate names
-    all_race_names_and_idx = get_all_race_info(racefile)
-    all_race_names = [name for name, _, _, _ in all_race_names_and_idx]
-    try:
-        custom_race_pos = all_race_names.index(current_race_name)
-    except ValueError:
-        custom_race_pos = -1
-
-    if custom_race_pos != -1:
-        _, offset, city_dup, code_dup = all_race_names_and_idx[custom_race_pos]
-        if offset == race_loc:
-            print(f"Replacing race at slot {position}")
-        else:
-            raise Exception(f"There's a race with this exact same name at {city_dup}_{code_dup}! Use -R to rename it.")
+    # Name of every slot once the batch is applied, and the other way around
+    names = {race.offset: race.name for race in table}
+    owners = {race.name: race.offset for race in table if race.name}
+    targets: dict[int, PackBatchEntry] = {}
+    errors = []
 
-    # Copy race block into memory card
-    racefile[race_loc : race_loc + RACE_SIZE] = input_bytes[0x10:]
+    for filename in filenames:
+        city, block = read_race_file(filename)
+        name = get_race_name(block, 0)
 
-    # Overwrite race name if a new name is given
-    if new_name is not None:
-        racefile[race_loc + 0x02 : race_loc + 0x02 + MAX_NAME] = new_name.encode('ascii').ljust(MAX_NAME, b'\x00')
+        race_loc = None
+        owner = owners.get(name)
+        if owner is not None:
+            owner_city, owner_slot = get_city_and_code_from_race_loc(owner)
+            if on_collision == "skip":
+                continue
+            if on_collision == "replace" and owner_city == city:
+                race_loc = owner
+            elif on_collision == "rename":
+                name = unique_race_name(name, owners)
+                block = rename_block(block, name)
+            else:
+                errors.append(f"{filename}: there's already a race named '{name}' at {owner_city}_{owner_slot}!")
+                continue
+
+        if race_loc is None:
+            free = [loc for loc in available[city] if loc not in targets]
+            if not free:
+                errors.append(f"{filename}: no slot left in {CITY_NAMES[city]}!")
+                continue
+            race_loc = free[0]
+
+        # The race that was there is overwritten, its name is free again
+        if owners.get(names[race_loc]) == race_loc:
+            del owners[names[race_loc]]
+        names[race_loc] = name
+        owners[name] = race_loc
+        targets[race_loc] = PackBatchEntry(filename, city, get_city_and_code_from_race_loc(race_loc)[1], name, block)
+
+    if errors:
+        raise Exception("\n".join(errors))
+    return list(targets.values())
+
+def pack_directory(
+    memcard: ps2mc,
+    profile: str,
+    directory: str,
+    slots: Iterable[int] | None = None,
+    on_collision: str = "error",
+) -> list[RaceRecord]:
+    """Pack every .mc3race of a directory with a single write, see plan_directory_import."""
+    batch = plan_directory_import(get_race_table(memcard, profile), find_race_files(directory), slots, on_collision)
+    return pack_batch(memcard, profile, batch)
+
+class SlotRef(NamedTuple):
+    profile: str
+    city: str
+    slot: int
+
+    def __str__(self) -> str:
+        return f"{self.profile}:{self.city}_{self.slot}"
+
+def copy_slot(memcard: ps2mc, src: SlotRef, dst: SlotRef, new_name: str | None = None) -> dict[str, list[RaceRecord]]:
+    """Copy the race at src over dst, returns the slots written per profile."""
+    return move_blocks(memcard, [(src, dst, new_name)])
+
+def move_slot(memcard: ps2mc, src: SlotRef, dst: SlotRef, new_name: str | None = None) -> dict[str, list[RaceRecord]]:
+    """copy_slot, leaving src empty."""
+    return move_blocks(memcard, [(src, dst, new_name)], blank=[src])
+
+def swap_slots(memcard: ps2mc, a: SlotRef, b: SlotRef) -> dict[str, list[RaceRecord]]:
+    # Either side may be empty, its block is as real as the other one
+    return move_blocks(memcard, [(a, b, None), (b, a, None)], empty_ok=True)
+
+def empty_block(memcard: ps2mc, ref: SlotRef) -> bytes:
+    """
+    What a slot holds once its race is moved away: the block of an empty slot
+    of the profile, in the same city if it has one. With no empty slot to copy,
+    the race stays in place under an empty name.
+    """
+    table = get_race_table(memcard, ref.profile)
+    empty = [race for race in table if not race.name]
+    empty.sort(key=lambda race: race.city != ref.city)
+    if empty:
+        return bytes(empty[0].block)
+    return rename_block(bytes(table.at(ref.city, ref.slot).block), "")
 
-    # Write updated racefile back to memory card
-    write_races_file(memcard, profile, bytes(racefile))
+def move_blocks(
+    memcard: ps2mc,
+    moves: Iterable[tuple[SlotRef, SlotRef, str | None]],
+    blank: Iterable[SlotRef] = (),
+    empty_ok: bool = False,
+) -> dict[str, list[RaceRecord]]:
+    """
+    Copy race blocks between slots of the cached racefiles, then empty the
+    blank slots. Every block is read before anything is written, and each
+    profile involved gets a single write once all of them pass the name checks.
+    """
+    batches: dict[str, list[PackBatchEntry]] = {}
+    for src, dst, new_name in moves:
+        if src == dst:
+            raise Exception(f"{src} can't be moved onto itself!")
+        if src.city != dst.city:
+            raise Exception(f"{src} is a {CITY_NAMES[src.city]} race, it can't go to {dst}!")
+        race = get_race_table(memcard, src.profile).at(src.city, src.slot)
+        if not race.name and (not empty_ok or new_name is not None):
+            raise Exception(f"{src} is empty, there's no race in it!")
+        block = bytes(race.block)
+        if new_name is not None:
+            block = rename_block(block, new_name)
+        batches.setdefault(dst.profile, []).append(PackBatchEntry(str(src), dst.city, dst.slot, get_race_name(block, 0), block))
+    for ref in blank:
+        batches.setdefault(ref.profile, []).append(PackBatchEntry(str(ref), ref.city, ref.slot, "", empty_block(memcard, ref)))
+
+    errors = []
+    for profile, batch in batches.items():
+        errors.extend(check_pack_batch(get_race_index(memcard, profile), batch))
+    if errors:
+        raise Exception("\n".join(errors))
+
+    return {profile: pack_batch(memcard, profile, batch) for profile, batch in batches.items()}
+
+def get_race_name(racefile: bytes, race_loc: int) -> str:
+    return racefile[race_loc + 0x02 : race_loc + 0x02 + MAX_NAME].decode('ascii', errors='ignore').rstrip('\x00')
+
+
+def _cached_racefile(memcard: ps2mc, profile: str) -> CachedRacefile:
+    with _cache_lock:
+        cached = _racefile_cache.get(memcard, {}).get(profile)
+    if cached is None:
+        _count("racefile.cache_misses")
+        cached = CachedRacefile(read_races_file(memcard, profile))
+        with _cache_lock:
+            _racefile_cache.setdefault(memcard, {})[profile] = cached
+    else:
+        _count("racefile.cache_hits")
+    return cached
+
+
+def find_profiles(memcard: ps2mc) -> list[str]:
+    return list(get_profile_catalog(memcard))
+
+
+def get_profile_catalog(memcard: ps2mc) -> dict[str, ProfileEntry]:
+    with _cache_lock:
+        catalog = _profile_catalog.get(memcard)
+    if catalog is None:
+        catalog = scan_profiles(memcard)
+        with _cache_lock:
+            _profile_catalog[memcard] = catalog
+    return catalog
+
+
+def scan_profiles(memcard: ps2mc) -> dict[str, ProfileEntry]:
+    """Walk the root directory once and each save directory found in it, always goes to the card."""
+    catalog: dict[str, ProfileEntry] = {}
+
+    _count("card.dir_opens")
+    with _timed("card.traverse"):
+        dir = memcard.dir_open("/")
+        try:
+            for ent in dir:
+                mode = ent[0]
+
+                if (mode & DF_EXISTS) == 0:
+                    continue
+
+                name = ent[8].decode("ascii", errors="ignore")
+
+                if (mode & DF_DIR) and name.startswith(PROFILE_PREFIX) and len(name) > len(PROFILE_PREFIX):
+                    profile = name[len(PROFILE_PREFIX):]
+                    catalog[profile] = _scan_profile(memcard, profile)
+        finally:
+            dir.close()
+
+    return catalog
+
+
+def _scan_profile(memcard: ps2mc, profile: str) -> ProfileEntry:
+    _count("card.dir_opens")
+    dir = memcard.dir_open(f"{PROFILE_PREFIX}{profile}")
+    try:
+        for ent in dir:
+            if (ent[0] & DF_EXISTS) and not (ent[0] & DF_DIR) and ent[8].rstrip(b"\0") == b"file01":
+                return ProfileEntry(profile, ent[2], ent[4])
+    finally:
+        dir.close()
+    return ProfileEntry(profile, None, None)
 
 
 def get_races_file(memcard: ps2mc, profile: str) -> bytes:
-    f =  memcard.open(f'BASLUS-21355{profile}/file01', "rb")
-    if f is None:
+    return _cached_racefile(memcard, profile).racefile
+
+
+def get_race_table(memcard: ps2mc, profile: str) -> RaceTable:
+    cached = _cached_racefile(memcard, profile)
+    if cached.table is None:
+        cached.table = RaceTable(cached.racefile)
+    return cached.table
+
+
+def get_race_index(memcard: ps2mc, profile: str) -> RaceIndex:
+    cached = _cached_racefile(memcard, profile)
+    if cached.index is None:
+        cached.index = RaceIndex(get_race_table(memcard, profile))
+    return cached.index
+
+
+def read_races_file(memcard: ps2mc, profile: str) -> bytes:
+    # Always goes to the memory card, use get_races_file unless the cache is known to be stale
+    entry = get_profile_catalog(memcard).get(profile)
+    if entry is None or entry.size is None:
         raise Exception("Save game not found! Is the profile name correct?")
+
+    _count("card.opens")
+    with _timed("card.read"):
+        try:
+            f = memcard.open(f'{PROFILE_PREFIX}{profile}/file01', "rb")
+        except (file_not_found, path_not_found):
+            f = None
+        if f is None:
+            raise Exception("Save game not found! Is the profile name correct?")
     
-    file = bytes(f.read())
-    f.close()
+        file = bytes(f.read())
+        f.close()
+    _count("racefile.bytes_read", len(file))
     return file
 
 
-def write_races_file(memcard: ps2mc, profile: str, racefile: bytes) -> None:
-    f = memcard.open(f'BASLUS-21355{profile}/file01', "wb")
-    f.write(racefile)
-    f.close()
+def write_races_file(
+    memcard: ps2mc,
+    profile: str,
+    racefile: bytes | bytearray,
+    dirty: Iterable[tuple[int, int]] | None = None
+) -> None:
+    # dirty lists the (offset, length) ranges that changed since the racefile was read,
+    # found by comparing against the cached racefile when not given
+    with _cache_lock:
+        old = _racefile_cache.get(memcard, {}).get(profile)
+
+    if old is None or len(old.racefile) != len(racefile):
+        # Nothing on the card to patch safely, write the whole file
+        ranges = None
+    elif dirty is None:
+        ranges = changed_ranges(old.racefile, racefile)
+    else:
+        ranges = merge_ranges(dirty)
+
+    if ranges is None or ranges:
+        for hook in _write_hooks:
+            hook(memcard, profile)
+
+    if ranges is None:
+        _count("card.opens")
+        with _timed("card.write"):
+            f = memcard.open(f'{PROFILE_PREFIX}{profile}/file01', "wb")
+            f.write(racefile)
+            f.close()
+        _count("racefile.bytes_written", len(racefile))
+        # A rewritten file01 gets new clusters and maybe a new size
+        entry = _scan_profile(memcard, profile)
+        with _cache_lock:
+            catalog = _profile_catalog.get(memcard)
+            if catalog is not None:
+                catalog[profile] = entry
+    elif ranges:
+        # Only the clusters under the changed bytes get rewritten
+        view = memoryview(racefile)
+        _count("card.opens")
+        with _timed("card.write"):
+            f = memcard.open(f'{PROFILE_PREFIX}{profile}/file01', "r+b")
+            for start, length in ranges:
+                f.seek(start)
+                f.write(view[start : start + length].tobytes())
+            f.close()
+        _count("racefile.bytes_written", sum(length for _, length in ranges))
+
+    cached = CachedRacefile(bytes(racefile))
+    with _cache_lock:
+        _racefile_cache.setdefault(memcard, {})[profile] = cached
+
+    # Carry the index over by re-reading only the slots that changed
+    if old is None or old.index is None or len(old.racefile) != len(cached.racefile):
+        return
+    # on a copy, the old index may still be read from another thread
+    old_table = RaceTable(old.racefile)
+    table = get_race_table(memcard, profile)
+    index = old.index.copy()
+    for old_race, race in zip(old_table, table):
+        if old_race.block != race.block:
+            index.update(race)
+    cached.index = index
+
+
+def check_memcard(memcard: ps2mc, path: str, quick: bool = False, cache_path: str | None = CHECK_CACHE) -> bool:
+    """
+    Check the file system of an open card. The quick check only walks the
+    game's save directories, the superblock was already read by ps2mc().
+    Images that passed a full check are remembered in cache_path.
+    """
+    if quick:
+        with _timed("check.quick"):
+            return quick_check_memcard(memcard)
+
+    if cache_path is None:
+        with _timed("check.full"):
+            return bool(memcard.check())
+
+    # Deferred, only full checks need them
+    import hashlib
+    import json
+
+    try:
+        with open(cache_path) as f:
+            cache = json.load(f)
+        checked, paths = cache["checked"], cache["paths"]
+    except (OSError, ValueError, KeyError, TypeError):
+        checked, paths = {}, {}
+
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    known = paths.get(path)
+    if known is not None and known[:2] == [stat.st_size, stat.st_mtime_ns]:
+        digest = known[2]
+    else:
+        with _timed("check.hash"):
+            sha = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    sha.update(chunk)
+            digest = sha.hexdigest()
+
+    if digest in checked:
+        _count("check.cache_hits")
+        ok = True
+    else:
+        _count("check.cache_misses")
+        with _timed("check.full"):
+            ok = bool(memcard.check())
+        if not ok:
+            return False
+        checked[digest] = stat.st_size
+
+    paths[path] = [stat.st_size, stat.st_mtime_ns, digest]
+    # Only the images of cards still on disk are worth remembering
+    paths = {known: entry for known, entry in paths.items() if os.path.exists(known)}
+    checked = {entry[2]: checked[entry[2]] for entry in paths.values() if entry[2] in checked}
+    _write_json_cache(cache_path, {"checked": checked, "paths": paths})
+    return ok
+
+
+def _write_json_cache(cache_path: str, data: dict) -> None:
+    # A temporary file of its own, so runs at the same time never write over each other's
+    import json
+    import tempfile
+    try:
+        directory = os.path.dirname(cache_path) or "."
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=directory, suffix=".tmp", delete=False) as f:
+            json.dump(data, f)
+        try:
+            os.replace(f.name, cache_path)
+        except OSError:
+            os.unlink(f.name)
+            raise
+    except OSError:
+        # Only a cache, whatever it held is worked out again next time
+        pass
+
+
+def quick_check_memcard(memcard: ps2mc) -> bool:
+    # Same rules as ps2mc.check(), limited to the root directory and the game's saves
+    # and without the scan for lost clusters over the whole FAT. Only goes through
+    # the public FAT and directory calls of ps2mc.
+    seen = bytearray(memcard.allocatable_cluster_end)
+    root = unpack_dirent(memcard.read_allocatable_cluster(0)[:PS2MC_DIRENT_LENGTH])
+    if _check_chain(memcard, seen, root[4], root[2] * PS2MC_DIRENT_LENGTH) is not None:
+        return False
+
+    ok = True
+    dir = memcard.dir_open("/")
+    try:
+        entries = list(dir)
+    finally:
+        dir.close()
+    for ent in entries:
+        name = ent[8].decode("ascii", errors="ignore")
+        if (ent[0] & DF_EXISTS) and (ent[0] & DF_DIR) and name.startswith(PROFILE_PREFIX):
+            if not _check_dir(memcard, seen, f"/{name}", ent):
+                ok = False
+    return ok
+
+
+def _check_chain(memcard: ps2mc, seen: bytearray, first_cluster: int, length: int) -> str | None:
+    # What is wrong with the FAT chain of a file, None when nothing is
+    cluster = first_cluster
+    count = 0
+    while cluster != PS2MC_FAT_CHAIN_END:
+        if not 0 <= cluster < len(seen):
+            return "invalid cluster in chain"
+        if seen[cluster]:
+            return "cross linked chain"
+        seen[cluster] = 1
+        count += 1
+        next_cluster = memcard.lookup_fat(cluster)
+        if next_cluster == PS2MC_FAT_CHAIN_END:
+            break
+        if not next_cluster & PS2MC_FAT_ALLOCATED_BIT:
+            return "unallocated cluster in chain"
+        cluster = next_cluster & ~PS2MC_FAT_ALLOCATED_BIT
+    if count != -(-length // memcard.cluster_size):
+        return "chain length doesn't match the file size"
+    return None
+
+
+def _check_dir(memcard: ps2mc, seen: bytearray, path: str, ent: tuple) -> bool:
+    if _check_chain(memcard, seen, ent[4], ent[2] * PS2MC_DIRENT_LENGTH) is not None:
+        return False
+    dir = memcard.dir_open(path)
+    try:
+        entries = list(dir)
+    finally:
+        dir.close()
+    if len(entries) < 2 or entries[0][8] != b"." or entries[1][8] != b"..":
+        return False
+
+    ok = True
+    for child in entries[2:]:
+        if not child[0] & DF_EXISTS:
+            continue
+        name = child[8].decode("ascii", errors="ignore")
+        if child[0] & DF_DIR:
+            ok = _check_dir(memcard, seen, f"{path}/{name}", child) and ok
+        elif _check_chain(memcard, seen, child[4], child[2]) is not None:
+            ok = False
+    return ok
+
+
+def merge_ranges(ranges: Iterable[tuple[int, int]]) -> list[tuple[int, int]]:
+    merged: list[tuple[int, int]] = []
+    for start, length in sorted(ranges):
+        if merged and start <= merged[-1][0] + merged[-1][1]:
+            last_start, last_length = merged[-1]
+            merged[-1] = (last_start, max(last_length, start + length - last_start))
+        else:
+            merged.append((start, length))
+    return merged
+
+
+def changed_ranges(old: bytes | bytearray, new: bytes | bytearray, chunk: int = RACE_SIZE) -> list[tuple[int, int]]:
+    """(offset, length) of every chunk that differs between two racefiles of the same size."""
+    old_view, new_view = memoryview(old), memoryview(new)
+    return merge_ranges(
+        (start, min(chunk, len(new) - start))
+        for start in range(0, len(new), chunk)
+        if old_view[start : start + chunk] != new_view[start : start + chunk]
+    )
+
+
+def invalidate_races_file(memcard: ps2mc, profile: str | None = None) -> None:
+    # Forgetting every racefile of a card also forgets which profiles it has
+    with _cache_lock:
+        if profile is None:
+            _profile_catalog.pop(memcard, None)
+        profiles = _racefile_cache.get(memcard)
+        if profiles is None:
+            return
+        if profile is None:
+            profiles.clear()
+        else:
+            profiles.pop(profile, None)
+
+
+class CachedRaces(NamedTuple):
+    races: list[RaceRecord]
+    # sha256 of the file01 the races were decoded from
+    digest: str
+    # False when the card image changed since, the races may be stale
+    fresh: bool
+
+
+def racefile_digest(racefile: bytes | bytearray) -> str:
+    import hashlib
+    return hashlib.sha256(racefile).hexdigest()
+
+
+def _read_race_cache(cache_path: str) -> dict:
+    import json
+    try:
+        with open(cache_path) as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def load_race_cache(path: str, profile: str, cache_path: str = RACE_CACHE) -> CachedRaces | None:
+    """Races of a profile as they were last seen, without opening the card."""
+    entry = _read_race_cache(cache_path).get(os.path.abspath(path), {}).get(profile)
+    if entry is None:
+        _count("race_cache.misses")
+        return None
+    try:
+        stat = os.stat(path)
+        races = [RaceRecord(name, offset, city, slot) for name, offset, city, slot in entry["races"]]
+        fresh = [stat.st_size, stat.st_mtime_ns] == entry["stat"]
+        digest = entry["digest"]
+    except (OSError, ValueError, KeyError, TypeError):
+        _count("race_cache.misses")
+        return None
+    _count("race_cache.hits" if fresh else "race_cache.stale")
+    return CachedRaces(races, digest, fresh)
+
+
+def store_race_cache(path: str, profile: str, racefile: bytes | bytearray, cache_path: str = RACE_CACHE) -> None:
+    """Remember the races of a profile for the card as it is on disk now, call it once the card is flushed."""
+    cache = _read_race_cache(cache_path)
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    digest = racefile_digest(racefile)
+    entry = cache.get(path, {}).get(profile)
+    if isinstance(entry, dict) and entry.get("stat") == [stat.st_size, stat.st_mtime_ns] and entry.get("digest") == digest:
+        return
+
+    # Only the cards still on disk are worth remembering
+    cache = {known: profiles for known, profiles in cache.items() if known == path or os.path.exists(known)}
+    cache.setdefault(path, {})[profile] = {
+        "stat": [stat.st_size, stat.st_mtime_ns],
+        "digest": digest,
+        "races": [list(race) for race in get_all_race_info(racefile)],
+    }
+    _write_json_cache(cache_path, cache)
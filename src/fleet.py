@@ -0,0 +1,104 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple
+
+from mymcplus.ps2mc import ps2mc
+
+from .core import RaceRecord, all_race_slots, extract_many, get_all_race_info, get_profile_catalog, get_races_file
+
+FLEET_ACTIONS = ("profiles", "list", "extract", "export")
+
+class FleetResult(NamedTuple):
+    card: str
+    profile: str | None
+    races: list[RaceRecord] | None = None
+    racefile: bytes | None = None
+    extracted: int = 0
+    # file01 size from the profile catalog, filled by every action
+    size: int | None = None
+    error: str | None = None
+
+def find_memcards(paths: Iterable[str], recursive: bool = False) -> list[str]:
+    cards = []
+    for path in paths:
+        if os.path.isdir(path):
+            found = Path(path).rglob("*.ps2") if recursive else Path(path).glob("*.ps2")
+            cards.extend(sorted(str(card) for card in found if card.is_file()))
+        elif os.path.isfile(path):
+            cards.append(path)
+        else:
+            raise Exception(f"Memory card {path} does not exist or the path is wrong!")
+    return cards
+
+def card_directories(cards: list[str], directory: str | None) -> dict[str, str]:
+    """
+    Output directory of every card: its path below the directory all the cards
+    share, without the extension. PCSX2 names every card Mcd001.ps2, so the
+    name alone would mix the races of cards from different folders.
+    """
+    if not cards:
+        return {}
+    paths = [os.path.abspath(card) for card in cards]
+    root = os.path.commonpath([os.path.dirname(path) for path in paths])
+    return {
+        card: os.path.join(str(directory), os.path.splitext(os.path.relpath(path, root))[0])
+        for card, path in zip(cards, paths)
+    }
+
+def fleet_job(card: str, pattern: str, action: str, directory: str | None = None) -> list[FleetResult]:
+    # Runs inside a worker process, which opens its own ps2mc for the card.
+    # directory is where this card extracts to, see card_directories.
+    results = []
+    try:
+        with open(card, "rb") as f:
+            memcard = ps2mc(f)
+            try:
+                for profile, entry in get_profile_catalog(memcard).items():
+                    if not fnmatchcase(profile, pattern):
+                        continue
+                    if action == "profiles":
+                        # Listing profiles never reads a racefile
+                        results.append(FleetResult(card, profile, size=entry.size))
+                    else:
+                        results.append(_profile_job(memcard, card, profile, action, directory)._replace(size=entry.size))
+            finally:
+                memcard.close()
+    except Exception as e:
+        results.append(FleetResult(card, None, error=str(e)))
+    return results
+
+def _profile_job(memcard: ps2mc, card: str, profile: str, action: str, directory: str | None) -> FleetResult:
+    try:
+        if action == "list":
+            return FleetResult(card, profile, races=get_all_race_info(get_races_file(memcard, profile)))
+        if action == "export":
+            return FleetResult(card, profile, racefile=get_races_file(memcard, profile))
+
+        output = os.path.join(str(directory), profile)
+        extracted = extract_many(memcard, profile, all_race_slots(), output)
+        failed = [result for result in extracted if result.error is not None]
+        error = f"{len(failed)} race(s) failed, first: {failed[0].error}" if failed else None
+        return FleetResult(card, profile, extracted=len(extracted) - len(failed), error=error)
+    except Exception as e:
+        return FleetResult(card, profile, error=str(e))
+
+def run_fleet(
+    cards: Iterable[str],
+    pattern: str,
+    action: str,
+    directory: str | None = None,
+    jobs: int | None = None
+) -> Iterator[FleetResult]:
+    if action not in FLEET_ACTIONS:
+        raise Exception(f"Unknown fleet action {action}! Use one of {', '.join(FLEET_ACTIONS)}")
+    if action == "extract" and directory is None:
+        raise Exception("Extracting a fleet needs an output directory")
+    cards = list(cards)
+    outputs = card_directories(cards, directory) if action == "extract" else {}
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(fleet_job, card, pattern, action, outputs.get(card)) for card in cards]
+        for future in as_completed(futures):
+            yield from future.result()
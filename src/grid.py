@@ -0,0 +1,110 @@
+import csv
+import json
+import os
+from typing import Sequence
+
+try:
+    import numpy as np
+except ImportError as e:
+    raise ImportError("The race grid needs numpy! Install it with 'pip install numpy'") from e
+
+from .core import CITIES, CITIES_ADDR, MAX_NAME, RACE_QTD, RACE_SIZE
+
+# One race slot as stored in file01
+RACE_DTYPE = np.dtype([
+    ("head", "u1", (0x02,)),
+    ("name", f"S{MAX_NAME}"),
+    ("body", f"V{RACE_SIZE - 0x02 - MAX_NAME}"),
+])
+
+# Cities follow each other in file01, so the whole grid is a single strided view
+CITY_STRIDE = CITIES_ADDR[CITIES[1]] - CITIES_ADDR[CITIES[0]]
+
+EXPORT_FORMATS = ("csv", "json", "npz")
+
+def race_grid(racefile: bytes | bytearray) -> np.ndarray:
+    """(city, slot) array of RACE_DTYPE viewing the racefile buffer, nothing is copied."""
+    for i, city in enumerate(CITIES):
+        if CITIES_ADDR[city] != CITIES_ADDR[CITIES[0]] + i * CITY_STRIDE:
+            raise ValueError(f"{city} races are not where the race grid expects them")
+    if len(racefile) < CITIES_ADDR[CITIES[0]] + len(CITIES) * CITY_STRIDE:
+        raise ValueError("Racefile is too small to hold every race slot")
+
+    return np.ndarray(
+        shape=(len(CITIES), RACE_QTD),
+        dtype=RACE_DTYPE,
+        buffer=racefile,
+        offset=CITIES_ADDR[CITIES[0]],
+        strides=(CITY_STRIDE, RACE_SIZE),
+    )
+
+def race_table(
+    racefiles: Sequence[bytes | bytearray],
+    cards: Sequence[str] | None = None,
+    profiles: Sequence[str] | None = None,
+) -> np.ndarray:
+    """Decode every slot of every racefile in one go, one row per race."""
+    grids = _stack_grids(racefiles)
+    count = len(racefiles)
+    per_file = len(CITIES) * RACE_QTD
+
+    names = np.char.decode(grids["name"].reshape(-1), "ascii", errors="ignore")
+    cities = np.tile(np.repeat(np.array(CITIES), RACE_QTD), count)
+    slots = np.tile(np.arange(RACE_QTD, dtype=np.uint8), count * len(CITIES))
+    offsets = np.tile(
+        (np.array([CITIES_ADDR[city] for city in CITIES], dtype=np.uint32)[:, None]
+         + np.arange(RACE_QTD, dtype=np.uint32) * RACE_SIZE).reshape(-1),
+        count,
+    )
+
+    columns = [("name", names), ("city", cities), ("slot", slots), ("offset", offsets)]
+    if cards is not None:
+        columns.insert(0, ("card", np.repeat(np.array(cards, dtype=str), per_file)))
+    if profiles is not None:
+        columns.insert(1 if cards is not None else 0, ("profile", np.repeat(np.array(profiles, dtype=str), per_file)))
+
+    table = np.empty(count * per_file, dtype=[(field, values.dtype) for field, values in columns])
+    for field, values in columns:
+        table[field] = values
+    return table
+
+def _stack_grids(racefiles: Sequence[bytes | bytearray]) -> np.ndarray:
+    # The single vectorized decode step copies every grid into one (file, city, slot) array
+    if not racefiles:
+        return np.empty((0, len(CITIES), RACE_QTD), RACE_DTYPE)
+    return np.stack([race_grid(racefile) for racefile in racefiles])
+
+def changed_slots(racefile_a: bytes | bytearray, racefile_b: bytes | bytearray) -> list[tuple[str, int]]:
+    """(city, slot) of every race whose bytes differ between two racefiles."""
+    a = race_grid(racefile_a).view(f"V{RACE_SIZE}")
+    b = race_grid(racefile_b).view(f"V{RACE_SIZE}")
+    return [(CITIES[city], int(slot)) for city, slot in zip(*np.nonzero(a != b))]
+
+def export_race_table(
+    path: str,
+    table: np.ndarray,
+    fmt: str | None = None,
+    racefiles: Sequence[bytes | bytearray] | None = None,
+) -> None:
+    """Write a race_table() as csv, json or npz, picked from the extension unless fmt is given.
+
+    npz also stores the raw race blocks when the racefiles are passed along."""
+    if fmt is None:
+        fmt = os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt not in EXPORT_FORMATS:
+        raise Exception(f"Can't export races as '{fmt}'! Use one of {', '.join(EXPORT_FORMATS)}")
+
+    fields = table.dtype.names or ()
+    if fmt == "csv":
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(fields)
+            writer.writerows(table.tolist())
+    elif fmt == "json":
+        with open(path, "w") as f:
+            json.dump([dict(zip(fields, row)) for row in table.tolist()], f, indent=1)
+    else:
+        arrays = {field: table[field] for field in fields}
+        if racefiles is not None:
+            arrays["blocks"] = _stack_grids(racefiles).view(np.uint8).reshape(-1, RACE_SIZE)
+        np.savez_compressed(path, **arrays)
@@ -1,25 +1,32 @@
 from io import BufferedRandom, BufferedReader, FileIO
 from PySide6.QtGui import (
-    QIcon, QPixmap, QStandardItemModel, QStandardItem
+    QIcon, QPixmap, QKeySequence, QShortcut, QFontDatabase
 )
 from .core import *
+from .journal import Journal, journal_path
+from .snapshot import SnapshotStore, enable_snapshots, snapshot_path
 from PySide6.QtWidgets import (
     QApplication, QFileDialog, QSpinBox, QLineEdit,
     QFormLayout, QLabel, QPushButton, QStackedWidget, QWidget,
     QVBoxLayout, QListView, QFrame, QTabWidget, QTableView,
-    QMessageBox, QPushButton, QHBoxLayout, QComboBox, QHeaderView
+    QMessageBox, QPushButton, QHBoxLayout, QComboBox, QHeaderView,
+    QListWidget, QProgressDialog, QProgressBar, QPlainTextEdit, QCheckBox,
+    QSplitter, QTreeWidget, QTreeWidgetItem
 )
 
 
 from PySide6.QtWidgets import QAbstractItemView
-from mymcplus.ps2mc import ps2mc, DF_DIR, DF_EXISTS
-from typing import cast
+from mymcplus.ps2mc import ps2mc
+from typing import Any, Callable, cast
 from PySide6.QtCore import Qt
-import qt_themes
 
-from PySide6.QtCore import QObject, Signal
-import re
+from PySide6.QtCore import (
+    QObject, Signal, QRunnable, QThreadPool, QSortFilterProxyModel,
+    QAbstractTableModel, QModelIndex, QPersistentModelIndex, QMimeData
+)
+import os
 import sys
+from pathlib import Path
 
 from configparser import ConfigParser
 
@@ -34,6 +41,8 @@ class History(QObject):
         self.memcard_path: Path | None = None
         self.extract_output_directory: Path | None = None
         self.pack_race_file: Path | None = None
+        self.quick_check: bool = False
+        self.workspace_cards: list[Path] = []
 
         self.get_ini(Path('./.goodies.ini'))
 
@@ -64,6 +73,12 @@ class History(QObject):
         pack_race = goodies[section].get("pack_race_file")
         if pack_race:
             self.pack_race_file = Path(pack_race)
+
+        self.quick_check = goodies[section].getboolean("quick_check", fallback=False)
+
+        workspace_cards = goodies[section].get("workspace_cards")
+        if workspace_cards:
+            self.workspace_cards = [Path(card) for card in workspace_cards.split(os.pathsep)]
     
     
     def set_ini(self, ini_file: Path) -> None:
@@ -83,25 +98,384 @@ class History(QObject):
     
         if self.pack_race_file:
             goodies[section]["pack_race_file"] = str(self.pack_race_file)
+
+        goodies[section]["quick_check"] = str(self.quick_check)
+
+        if self.workspace_cards:
+            goodies[section]["workspace_cards"] = os.pathsep.join(str(card) for card in self.workspace_cards)
     
         with open(ini_file, "w") as f:
             goodies.write(f)
 
+class JobCancelled(Exception):
+    pass
+
+class JobSignals(QObject):
+    progress  = Signal(object, int, int)
+    finished  = Signal(object, object)
+    failed    = Signal(object, str)
+    cancelled = Signal(object)
+
+class Job(QRunnable):
+    """
+    Runs fn(job) on a pool thread. fn reports progress through job.progress,
+    which raises JobCancelled once the job is cancelled.
+    """
+    def __init__(self, fn: Callable[["Job"], Any]):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.fn = fn
+        self.signals = JobSignals()
+        self._cancelled = False
+
+    def cancel(self) -> None:
+        self._cancelled = True
+
+    def progress(self, done: int, total: int) -> None:
+        if self._cancelled:
+            raise JobCancelled()
+        self.signals.progress.emit(self, done, total)
+
+    def run(self) -> None:
+        try:
+            if self._cancelled:
+                raise JobCancelled()
+            result = self.fn(self)
+        except JobCancelled:
+            self.signals.cancelled.emit(self)
+        except Exception as e:
+            self.signals.failed.emit(self, str(e))
+        else:
+            self.signals.finished.emit(self, result)
+
+class RaceModel(QAbstractTableModel):
+    """
+    Races of the current profile, shared by every view. Cells are read from
+    the racefile buffer when asked for, or from the race cache until the card
+    is read. Views sort through their own proxy on SORT_ROLE, so rows here stay
+    in racefile order.
+    """
+    HEADERS = ("Name", "City", "Slot", "Offset")
+    SORT_ROLE = Qt.ItemDataRole.UserRole
+    MIME_TYPE = "application/x-racist-slot"
+
+    # A row was dropped onto another: source card, source slot, card, slot and
+    # whether to copy instead of move
+    slotDropped = Signal(str, object, str, object, bool)
+
+    def __init__(self, parent: QObject | None = None):
+        super().__init__(parent)
+        # Card and profile the rows belong to, dragged rows carry them along
+        self.card: str | None = None
+        self.profile: str | None = None
+        self._table: RaceTable | list[RaceRecord] | None = None
+        # Position of each race name in alphabetical order, the only key that isn't already an int
+        self._name_keys: list[int] = []
+
+    def rowCount(self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()) -> int:
+        if parent.isValid() or self._table is None:
+            return 0
+        return len(self._table)
+
+    def columnCount(self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index: QModelIndex | QPersistentModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if self._table is None or not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+
+        # Rows follow all_race_slots(), so city and slot come from the row alone
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return self._table[row].name
+            if column == 1:
+                return CITIES[row // RACE_QTD]
+            if column == 2:
+                return row % RACE_QTD
+            return f"0x{self._table[row].offset:04X}"
+
+        if role == self.SORT_ROLE:
+            if column == 0:
+                return self._name_keys[row]
+            if column == 1:
+                return row // RACE_QTD
+            if column == 2:
+                return row % RACE_QTD
+            return self._table[row].offset
+
+        return None
+
+    def flags(self, index: QModelIndex | QPersistentModelIndex) -> Qt.ItemFlag:
+        flags = super().flags(index)
+        if index.isValid():
+            flags |= Qt.ItemFlag.ItemIsDragEnabled | Qt.ItemFlag.ItemIsDropEnabled
+        return flags
+
+    def supportedDropActions(self) -> Qt.DropAction:
+        return Qt.DropAction.MoveAction | Qt.DropAction.CopyAction
+
+    def mimeTypes(self) -> list[str]:
+        return [self.MIME_TYPE]
+
+    def mimeData(self, indexes) -> QMimeData:
+        data = QMimeData()
+        if indexes and self.card is not None and self.profile is not None:
+            data.setData(self.MIME_TYPE, f"{self.card}\n{self.profile}\n{indexes[0].row()}".encode("utf-8"))
+        return data
+
+    def dropMimeData(self, data: QMimeData, action: Qt.DropAction, row: int, column: int, parent: QModelIndex | QPersistentModelIndex) -> bool:
+        # Only drops onto a row mean something, the model never gains or loses rows
+        if not data.hasFormat(self.MIME_TYPE) or not parent.isValid() or self.card is None or self.profile is None:
+            return False
+        card, profile, src_row = bytes(data.data(self.MIME_TYPE).data()).decode("utf-8").rsplit("\n", 2)
+        src = SlotRef(profile, CITIES[int(src_row) // RACE_QTD], int(src_row) % RACE_QTD)
+        dst = SlotRef(self.profile, CITIES[parent.row() // RACE_QTD], parent.row() % RACE_QTD)
+        if (card, src) != (self.card, dst):
+            self.slotDropped.emit(card, src, self.card, dst, action == Qt.DropAction.CopyAction)
+        return True
+
+    def load(self, table: RaceTable | list[RaceRecord]) -> None:
+        self.beginResetModel()
+        self._table = table
+        self._name_keys = self.name_keys(table)
+        self.endResetModel()
+
+    def clear_races(self) -> None:
+        self.beginResetModel()
+        self._table = None
+        self._name_keys = []
+        self.endResetModel()
+
+    def update_races(self, table: RaceTable, races: Iterable[RaceRecord]) -> None:
+        # Packing writes a new racefile, swap to it and only report the packed rows.
+        # Other name keys may shift, but never relative to each other.
+        self._table = table
+        self._name_keys = self.name_keys(table)
+        for row in sorted({CITIES.index(race.city) * RACE_QTD + race.slot for race in races}):
+            cell = self.index(row, 0)
+            self.dataChanged.emit(cell, cell, [Qt.ItemDataRole.DisplayRole, self.SORT_ROLE])
+
+    @staticmethod
+    def name_keys(table: RaceTable | list[RaceRecord]) -> list[int]:
+        names = [race.name for race in table]
+        keys = [0] * len(names)
+        for key, row in enumerate(sorted(range(len(names)), key=names.__getitem__)):
+            keys[row] = key
+        return keys
+
 class AppState(QObject):
     profileChanged = Signal(object)
     memcardChanged = Signal(object)
+    racesLoaded    = Signal()
 
     windowPushed   = Signal(QWidget)
     windowPopped   = Signal()
 
+    # Background jobs, always delivered on the GUI thread
+    jobStarted   = Signal(object)
+    jobProgress  = Signal(object, int, int)
+    jobFinished  = Signal(object, object)
+    jobFailed    = Signal(object, str)
+    jobCancelled = Signal(object)
+
     def __init__(self):
         super().__init__()
         self._profile: str | None = None
         self._memcard: ps2mc | None = None
         self._memcard_file: BufferedRandom | None = None
         self._memcard_path: Path | None = None
+        self._snapshots: SnapshotStore | None = None
         self.history =  History()
 
+        # ps2mc is not thread safe, so every job touching the memory card,
+        # reads and writes alike, runs one after the other on this pool
+        self.card_pool = QThreadPool(self)
+        self.card_pool.setMaxThreadCount(1)
+        self._jobs: dict[Job, dict[str, Callable | None]] = {}
+        self._pools: set[QThreadPool] = {self.card_pool}
+
+        # Cards opened side by side, each with its own pool
+        self.workspace = Workspace(self)
+
+        self.race_model = RaceModel(self)
+        self.race_index: RaceIndex | None = None
+        self._races_loading = False
+
+    def load_races(self, on_error: Callable[[str], None] | None = None) -> None:
+        """Fill race_model for the current profile, unless it is already there."""
+        if self.race_index is not None or self._races_loading:
+            return
+
+        memcard = self.memcard
+        profile = self.profile
+
+        self.race_model.card = str(self._memcard_path)
+        self.race_model.profile = profile
+        # Show the races as last seen right away, the job below checks them against the card
+        cached = load_race_cache(str(self._memcard_path), profile)
+        if cached is not None:
+            self.race_model.load(cached.races)
+
+        def read(job: Job) -> tuple[RaceTable, RaceIndex, bool]:
+            # Same file01 as the cached races, the rows on screen are already right
+            same = cached is not None and racefile_digest(get_races_file(memcard, profile)) == cached.digest
+            return get_race_table(memcard, profile), get_race_index(memcard, profile), same
+
+        def loaded(races: tuple[RaceTable, RaceIndex, bool]) -> None:
+            self._races_loading = False
+            # The profile may have changed while the job was queued
+            if memcard is not self._memcard or profile != self._profile:
+                return
+            table, self.race_index, same = races
+            if cached is None or len(cached.races) != len(table):
+                self.race_model.load(table)
+            elif not same:
+                self.race_model.update_races(table, [
+                    race.record() for race, old in zip(table, cached.races) if race.record() != old
+                ])
+            self.racesLoaded.emit()
+
+        def failed(error: str) -> None:
+            self._races_loading = False
+            if on_error is not None:
+                on_error(error)
+
+        self._races_loading = True
+        self.run_job(
+            read,
+            on_result=loaded,
+            on_error=failed,
+        )
+
+    def races_packed(self, races: list[RaceRecord], table: RaceTable, index: RaceIndex) -> None:
+        if self.race_index is None:
+            # Written before the races were shown, or only the cached ones are
+            self.race_model.load(table)
+        else:
+            self.race_model.update_races(table, races)
+        self.race_index = index
+
+    def journal(self) -> Journal:
+        return Journal(journal_path(str(self._memcard_path)))
+
+    def run_write_job(
+        self,
+        write: Callable[[ps2mc, str], list[RaceRecord]],
+        on_result: Callable[[tuple[list[RaceRecord], RaceTable, RaceIndex]], None] | None = None,
+        on_error: Callable[[str], None] | None = None,
+    ) -> Job:
+        """Run a write to the current profile on the card pool, recorded in the undo journal."""
+        memcard, profile, journal = self.memcard, self.profile, self.journal()
+
+        def job(job: Job) -> tuple[list[RaceRecord], RaceTable, RaceIndex]:
+            with journal.track(memcard, profile):
+                races = write(memcard, profile)
+            return races, get_race_table(memcard, profile), get_race_index(memcard, profile)
+
+        return self.run_job(job, on_result=on_result, on_error=on_error)
+
+    def move_race(self, src: SlotRef, dst: SlotRef, copy: bool, on_error: Callable[[str], None] | None = None) -> Job:
+        """
+        Copy src over dst, renamed when its name is taken, or move it there.
+        A move onto a race swaps the two.
+        """
+        def write(memcard: ps2mc, profile: str) -> list[RaceRecord]:
+            return drop_race(memcard, src, dst, copy).get(profile, [])
+
+        return self.run_write_job(write, on_result=lambda result: self.races_packed(*result), on_error=on_error)
+
+    def undo(
+        self,
+        redo: bool = False,
+        on_result: Callable[[list[RaceRecord]], None] | None = None,
+        on_error: Callable[[str], None] | None = None,
+    ) -> None:
+        """Undo or redo the last journaled write to the current profile."""
+        if self._memcard is None or self._profile is None:
+            return
+        memcard, profile, journal = self.memcard, self.profile, self.journal()
+
+        def job(job: Job) -> tuple[list[RaceRecord], RaceTable, RaceIndex]:
+            entry = journal.redo(memcard, profile) if redo else journal.undo(memcard, profile)
+            return entry.records(), get_race_table(memcard, profile), get_race_index(memcard, profile)
+
+        def done(result: tuple[list[RaceRecord], RaceTable, RaceIndex]) -> None:
+            # The profile may have changed while the job was queued
+            if memcard is self._memcard and profile == self._profile:
+                self.races_packed(*result)
+            if on_result is not None:
+                on_result(result[0])
+
+        self.run_job(job, on_result=done, on_error=on_error)
+
+    def reset_races(self) -> None:
+        self.race_index = None
+        self.race_model.clear_races()
+
+    def run_job(
+        self,
+        fn: Callable[[Job], Any],
+        on_result: Callable[[Any], None] | None = None,
+        on_error: Callable[[str], None] | None = None,
+        on_progress: Callable[[int, int], None] | None = None,
+        on_cancel: Callable[[], None] | None = None,
+        pool: QThreadPool | None = None,
+    ) -> Job:
+        # Jobs go to the card pool unless the card has a pool of its own
+        if pool is None:
+            pool = self.card_pool
+        self._pools.add(pool)
+        job = Job(fn)
+        job.signals.progress.connect(self._job_progress)
+        job.signals.finished.connect(self._job_finished)
+        job.signals.failed.connect(self._job_failed)
+        job.signals.cancelled.connect(self._job_cancelled)
+        self._jobs[job] = {
+            "result": on_result,
+            "error": on_error,
+            "progress": on_progress,
+            "cancel": on_cancel,
+        }
+        pool.start(job)
+        self.jobStarted.emit(job)
+        return job
+
+    def _job_progress(self, job: Job, done: int, total: int) -> None:
+        self.jobProgress.emit(job, done, total)
+        callback = self._jobs.get(job, {}).get("progress")
+        if callback is not None:
+            callback(done, total)
+
+    def _job_finished(self, job: Job, result: Any) -> None:
+        callbacks = self._jobs.pop(job, {})
+        self.jobFinished.emit(job, result)
+        callback = callbacks.get("result")
+        if callback is not None:
+            callback(result)
+
+    def _job_failed(self, job: Job, error: str) -> None:
+        callbacks = self._jobs.pop(job, {})
+        self.jobFailed.emit(job, error)
+        callback = callbacks.get("error")
+        if callback is not None:
+            callback(error)
+
+    def _job_cancelled(self, job: Job) -> None:
+        callbacks = self._jobs.pop(job, {})
+        self.jobCancelled.emit(job)
+        callback = callbacks.get("cancel")
+        if callback is not None:
+            callback()
+
+    def busy(self) -> bool:
+        return bool(self._jobs)
+
     @property
     def profile(self) -> str:
         assert self._profile is not None, "Profile is not set! Why get it?"
@@ -110,6 +484,7 @@ class AppState(QObject):
     @profile.setter
     def profile(self, value: str):
         self._profile = value
+        self.reset_races()
         self.profileChanged.emit(value)
 
     @property
@@ -122,20 +497,324 @@ class AppState(QObject):
 
     @memcard.setter
     def memcard(self, value: Path):
-        self._memcard_path = value
-        self._memcard_file = open(value, "r+b")
-        self._memcard = ps2mc(self._memcard_file)
+        f = open(value, "r+b")
+        try:
+            memcard = ps2mc(f)
+        except Exception:
+            f.close()
+            raise
+        self.use_memcard(value, f, memcard)
+
+    def use_memcard(self, path: Path, f: BufferedRandom, memcard: ps2mc) -> None:
+        # Takes over a card that is already open, so it is not opened twice
+        self.close_memcard()
+        self.reset_races()
+        self._memcard_path = path
+        self._memcard_file = f
+        self._memcard = memcard
+        # Every write of the session snapshots the card first
+        self._snapshots = SnapshotStore(snapshot_path(str(path)))
+        enable_snapshots(memcard, self._snapshots)
         self.memcardChanged.emit(self._memcard)
 
     def shutdown(self):
+        for job in self._jobs:
+            job.cancel()
+        for pool in self._pools:
+            pool.waitForDone()
         self.close_memcard()
+        self.workspace.close()
         self.history.set_ini(Path('./.goodies.ini'))
 
+    def release_memcard(self, path: Path | str, on_released: Callable[[], None]) -> None:
+        """
+        Close the card if it is the one open, so the workspace can take it over.
+        The close is queued behind the jobs still running on the card, on_released
+        is called once it is done, or right away for any other card.
+        """
+        if self._memcard_path is None or os.path.abspath(self._memcard_path) != os.path.abspath(path):
+            on_released()
+            return
+        card = (self._memcard_path, self._memcard_file, self._memcard, self._snapshots,
+                self._profile if self.race_index is not None else None)
+        self._memcard_path = self._memcard_file = self._memcard = self._snapshots = None
+        self.reset_races()
+        self.run_job(
+            lambda job: close_card(*card),
+            on_result=lambda _: on_released(),
+            on_error=lambda error: on_released(),
+        )
+
     def close_memcard(self):
-        if self._memcard is not None:
-            self._memcard.close()
-        if self._memcard_file is not None:
-            self._memcard_file.close()
+        close_card(self._memcard_path, self._memcard_file, self._memcard, self._snapshots,
+                   self._profile if self.race_index is not None else None)
+        self._memcard = None
+        self._memcard_file = None
+        self._snapshots = None
+
+def close_card(
+    path: Path | None,
+    f: BufferedRandom | None,
+    memcard: ps2mc | None,
+    snapshots: SnapshotStore | None,
+    profile: str | None,
+) -> None:
+    # profile is the one whose races are shown, they go to the race cache
+    racefile = None
+    if memcard is not None:
+        if profile is not None:
+            racefile = get_races_file(memcard, profile)
+        invalidate_races_file(memcard)
+        memcard.close()
+    if f is not None:
+        f.close()
+    if snapshots is not None:
+        snapshots.close()
+    if racefile is not None and path is not None:
+        store_race_cache(str(path), cast(str, profile), racefile)
+
+def drop_race(memcard: ps2mc, src: SlotRef, dst: SlotRef, copy: bool) -> dict[str, list[RaceRecord]]:
+    """
+    What dropping src onto dst does: a copy is renamed when its name is
+    taken, a move onto a race swaps the two.
+    """
+    target = get_race_table(memcard, dst.profile)
+    if copy:
+        name = get_race_table(memcard, src.profile).at(src.city, src.slot).name
+        taken = [race.name for race in target if (race.city, race.slot) != (dst.city, dst.slot)]
+        return copy_slot(memcard, src, dst, unique_race_name(name, taken) if name in taken else None)
+    if target.at(dst.city, dst.slot).name:
+        return swap_slots(memcard, src, dst)
+    return move_slot(memcard, src, dst)
+
+class CardSession:
+    """A card open in the workspace, its jobs run one at a time on its own pool."""
+    def __init__(self, path: str, parent: QObject):
+        self.path = path
+        self.pool = QThreadPool(parent)
+        self.pool.setMaxThreadCount(1)
+        self.f: BufferedRandom | None = None
+        self.memcard: ps2mc | None = None
+        self.snapshots = SnapshotStore(snapshot_path(path))
+        self.journal = Journal(journal_path(path))
+        # One per profile with a save, filled as the racefiles load
+        self.models: dict[str, RaceModel] = {}
+
+    def close(self) -> None:
+        self.pool.waitForDone()
+        if self.memcard is not None:
+            invalidate_races_file(self.memcard)
+            self.memcard.close()
+        if self.f is not None:
+            self.f.close()
+        self.snapshots.close()
+        self.memcard = None
+        self.f = None
+
+class Workspace(QObject):
+    """
+    Several cards with all of their profiles at once. Cards load next to each
+    other, each on its own pool since ps2mc is only safe one call at a time.
+    """
+    cardOpened  = Signal(object)
+    cardFailed  = Signal(str, str)
+    cardClosed  = Signal(str)
+    racesLoaded = Signal(object, str)
+
+    def __init__(self, state: "AppState"):
+        super().__init__(state)
+        self.state = state
+        self.cards: dict[str, CardSession] = {}
+
+    def open_cards(self, paths: Iterable[Path | str], quick: bool = True) -> None:
+        for path in paths:
+            path = os.path.abspath(path)
+            if path in self.cards:
+                continue
+            session = CardSession(path, self)
+            self.cards[path] = session
+            # The same image open twice would have two ps2mc writing over each other
+            self.state.release_memcard(path, lambda session=session: self._open(session, quick))
+
+    def _open(self, session: CardSession, quick: bool) -> None:
+        if self.cards.get(session.path) is not session:
+            # Closed while the card was being released
+            return
+        self.state.run_job(
+            lambda job: MemcardSelect.open_memcard(Path(session.path), quick),
+            on_result=lambda opened: self._opened(session, *opened),
+            on_error=lambda error: self._failed(session, error),
+            pool=session.pool,
+        )
+
+    def _opened(self, session: CardSession, f: BufferedRandom, memcard: ps2mc, valid: bool) -> None:
+        if self.cards.get(session.path) is not session:
+            # Closed while it was opening
+            memcard.close()
+            f.close()
+            return
+        # A card the check found problems in opens anyway, like it does in MemcardSelect
+        session.f = f
+        session.memcard = memcard
+        enable_snapshots(memcard, session.snapshots)
+
+        # The catalog was built by open_memcard, so this doesn't touch the card
+        for profile, entry in get_profile_catalog(memcard).items():
+            if entry.size is None:
+                continue
+            model = RaceModel(self)
+            model.card = session.path
+            model.profile = profile
+            session.models[profile] = model
+        self.cardOpened.emit(session)
+
+        for profile, model in session.models.items():
+            self.state.run_job(
+                lambda job, profile=profile: get_race_table(memcard, profile),
+                on_result=lambda table, profile=profile, model=model: self._loaded(session, profile, model, table),
+                on_error=lambda error, profile=profile: self.cardFailed.emit(session.path, f"{profile}: {error}"),
+                pool=session.pool,
+            )
+
+    def _loaded(self, session: CardSession, profile: str, model: RaceModel, table: RaceTable) -> None:
+        model.load(table)
+        self.racesLoaded.emit(session, profile)
+
+    def _failed(self, session: CardSession, error: str) -> None:
+        if self.cards.get(session.path) is session:
+            del self.cards[session.path]
+        session.snapshots.close()
+        self.cardFailed.emit(session.path, error)
+
+    def close_card(self, path: Path | str) -> None:
+        session = self.cards.pop(os.path.abspath(path), None)
+        if session is not None:
+            session.close()
+            self.cardClosed.emit(session.path)
+
+    def close(self) -> None:
+        for path in list(self.cards):
+            self.close_card(path)
+
+    def move_race(
+        self,
+        src_card: str,
+        src: SlotRef,
+        dst_card: str,
+        dst: SlotRef,
+        copy: bool,
+        on_error: Callable[[str], None] | None = None,
+    ) -> None:
+        """drop_race between any two open profiles. Races dropped onto another card are always copied."""
+        src_session, dst_session = self.cards.get(src_card), self.cards.get(dst_card)
+        if src_session is None or dst_session is None or src_session.memcard is None or dst_session.memcard is None:
+            if on_error is not None:
+                on_error("The memory card was closed!")
+            return
+
+        if src_session is dst_session:
+            session, memcard = src_session, src_session.memcard
+
+            def write(job: Job) -> dict[str, tuple[list[RaceRecord], RaceTable]]:
+                with session.journal.track(memcard, *sorted({src.profile, dst.profile})):
+                    written = drop_race(memcard, src, dst, copy)
+                return {profile: (races, get_race_table(memcard, profile)) for profile, races in written.items()}
+
+            self.state.run_job(write, on_result=lambda result: self._written(session, result), on_error=on_error, pool=session.pool)
+            return
+
+        # Read on the pool of one card, written on the pool of the other
+        src_memcard, dst_memcard = src_session.memcard, dst_session.memcard
+
+        def read(job: Job) -> bytes:
+            if src.city != dst.city:
+                raise Exception(f"{src} is a {CITY_NAMES[src.city]} race, it can't go to {dst}!")
+            return bytes(get_race_table(src_memcard, src.profile).at(src.city, src.slot).block)
+
+        def write(block: bytes) -> dict[str, tuple[list[RaceRecord], RaceTable]]:
+            name = get_race_name(block, 0)
+            taken = [race.name for race in get_race_table(dst_memcard, dst.profile) if (race.city, race.slot) != (dst.city, dst.slot)]
+            new_name = unique_race_name(name, taken) if name in taken else None
+            entry = make_batch_entry(f"{os.path.basename(src_card)}:{src}", dst.city, dst.slot, block, new_name)
+            with dst_session.journal.track(dst_memcard, dst.profile):
+                races = pack_batch(dst_memcard, dst.profile, [entry])
+            return {dst.profile: (races, get_race_table(dst_memcard, dst.profile))}
+
+        self.state.run_job(
+            read,
+            on_result=lambda block: self.state.run_job(
+                lambda job: write(block),
+                on_result=lambda result: self._written(dst_session, result),
+                on_error=on_error,
+                pool=dst_session.pool,
+            ),
+            on_error=on_error,
+            pool=src_session.pool,
+        )
+
+    def _written(self, session: CardSession, result: dict[str, tuple[list[RaceRecord], RaceTable]]) -> None:
+        for profile, (races, table) in result.items():
+            model = session.models.get(profile)
+            if model is not None:
+                model.update_races(table, races)
+
+def enable_race_drag_drop(table: QTableView) -> None:
+    # Drag a race onto another slot to move it there, hold Ctrl to copy it
+    table.setSelectionMode(QTableView.SelectionMode.SingleSelection)
+    table.setDragDropMode(QAbstractItemView.DragDropMode.DragDrop)
+    table.setDefaultDropAction(Qt.DropAction.MoveAction)
+    table.setDragDropOverwriteMode(True)
+
+def race_proxy_model(model: RaceModel, parent: QObject) -> QSortFilterProxyModel:
+    # Each view sorts on its own, without reordering the shared model
+    proxy = QSortFilterProxyModel(parent)
+    proxy.setSourceModel(model)
+    proxy.setSortRole(RaceModel.SORT_ROLE)
+    return proxy
+
+class StatsPane(QWidget):
+    """Debug pane with the core counters and timings, collected while it is open."""
+    def __init__(self, state: AppState):
+        super().__init__()
+        self.state = state
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        self.text.setMaximumHeight(160)
+        layout.addWidget(QLabel("Stats (F12 to hide):"))
+        layout.addWidget(self.text)
+
+        reset_btn = QPushButton("Reset")
+        reset_btn.clicked.connect(self.reset)
+        layout.addWidget(reset_btn)
+
+        for signal in (self.state.jobFinished, self.state.jobFailed, self.state.jobCancelled):
+            signal.connect(self.refresh)
+
+    def showEvent(self, event) -> None:
+        enable_stats()
+        self.refresh()
+        super().showEvent(event)
+
+    def hideEvent(self, event) -> None:
+        # Nothing is counted while nobody looks
+        disable_stats()
+        super().hideEvent(event)
+
+    def reset(self) -> None:
+        stats = get_stats()
+        if stats is not None:
+            stats.reset()
+        self.refresh()
+
+    def refresh(self, *_) -> None:
+        stats = get_stats()
+        if stats is not None:
+            self.text.setPlainText(stats.report() or "Nothing measured yet.")
 
 class MainView(QWidget):
     stack: QStackedWidget
@@ -191,22 +870,52 @@ class MainView(QWidget):
         bottom_layout.addStretch()
         
         main_layout.addLayout(bottom_layout)
+
+        # Shown while the memory card is busy
+        self.busy_bar = QProgressBar()
+        self.busy_bar.setRange(0, 0)
+        self.busy_bar.setTextVisible(False)
+        self.busy_bar.setMaximumHeight(6)
+        self.busy_bar.setVisible(False)
+        main_layout.addWidget(self.busy_bar)
+
+        self.stats_pane = StatsPane(self.state)
+        self.stats_pane.setVisible(False)
+        main_layout.addWidget(self.stats_pane)
+        stats_shortcut = QShortcut(QKeySequence(Qt.Key.Key_F12), self)
+        stats_shortcut.activated.connect(lambda: self.stats_pane.setVisible(not self.stats_pane.isVisible()))
+        undo_shortcut = QShortcut(QKeySequence(QKeySequence.StandardKey.Undo), self)
+        undo_shortcut.activated.connect(lambda: self.undo(False))
+        redo_shortcut = QShortcut(QKeySequence(QKeySequence.StandardKey.Redo), self)
+        redo_shortcut.activated.connect(lambda: self.undo(True))
     
         # Signals
         self.state.windowPushed.connect(self.push)
         self.state.windowPopped.connect(self.pop)
+        for signal in (self.state.jobStarted, self.state.jobFinished, self.state.jobFailed, self.state.jobCancelled):
+            signal.connect(self.update_busy)
     
         # First page
         first = MemcardSelect(self.state)
         self.state.windowPushed.emit(first)
 
 
+    def undo(self, redo: bool) -> None:
+        action = "Redone" if redo else "Undone"
+        self.state.undo(
+            redo,
+            on_result=lambda races: QMessageBox.information(
+                self, action, "\n".join(f"{action} {race.city}_{race.slot}" for race in races)
+            ),
+            on_error=lambda error: QMessageBox.critical(self, "Error", error),
+        )
+
     def push(self, widget):
         self.stack.addWidget(widget)
         self.history.append(widget)
         self.stack.setCurrentWidget(widget)
         # Enable back button if there’s more than one window
-        self.back_button.setEnabled(len(self.history) > 1)
+        self.update_busy()
     
     def pop(self):
         if len(self.history) > 1:
@@ -215,10 +924,16 @@ class MainView(QWidget):
             widget.deleteLater()
             self.stack.setCurrentWidget(self.history[-1])
         # Disable back button if we are back at first window
-        self.back_button.setEnabled(len(self.history) > 1)
+        self.update_busy()
 
     def back(self):
         self.pop()
+
+    def update_busy(self, *_) -> None:
+        busy = self.state.busy()
+        self.busy_bar.setVisible(busy)
+        # Leaving a view mid job would drop the view that waits for the result
+        self.back_button.setEnabled(not busy and len(self.history) > 1)
     
     def shutdown(self):
         self.state.shutdown()
@@ -233,22 +948,34 @@ class ProfileSelect(QWidget):
     
         profile_name_label = QLabel("Profile:")
     
-        profile_combo = QComboBox()
-        profile_combo.setPlaceholderText("Select a profile")
-    
-        # Populate with existing profiles
-        profiles = self.find_all_profiles()
-        profile_combo.addItems(profiles)
+        self.profile_combo = QComboBox()
+        self.profile_combo.setPlaceholderText("Looking for profiles...")
+        self.profiles: list[str] | None = None
     
-        form_layout.addRow(profile_name_label, profile_combo)
+        form_layout.addRow(profile_name_label, self.profile_combo)
     
-        submit = QPushButton("Next")
-        form_layout.addRow(submit)
+        self.submit_btn = QPushButton("Next")
+        self.submit_btn.setEnabled(False)
+        form_layout.addRow(self.submit_btn)
     
-        submit.clicked.connect(
-            lambda: self.submit(profile_combo.currentText())
+        self.submit_btn.clicked.connect(
+            lambda: self.submit(self.profile_combo.currentText())
         )
 
+        # Populate with existing profiles
+        memcard = cast(ps2mc, self.state.memcard)
+        self.state.run_job(
+            lambda job: find_profiles(memcard),
+            on_result=self.set_profiles,
+            on_error=self.show_error_dlg,
+        )
+
+    def set_profiles(self, profiles: list[str]) -> None:
+        self.profiles = profiles
+        self.profile_combo.addItems(profiles)
+        self.profile_combo.setPlaceholderText("Select a profile")
+        self.submit_btn.setEnabled(True)
+
 
     def submit(self, profile: str) -> None:
         result = self.validate(profile)
@@ -263,35 +990,12 @@ class ProfileSelect(QWidget):
     def validate(self, profile: str) -> str | None:
         if len(profile) == 0:
             return "Profile name not informed!"
-        profiles = self.find_all_profiles()
-        if profile not in profiles:
+        if self.profiles is None or profile not in self.profiles:
             return "This profile is not in the memory card!"
         return None
 
     def find_all_profiles(self) -> list[str]:
-        memcard = cast(ps2mc, self.state.memcard)
-    
-        profile_pattern = re.compile(r"^BASLUS-21355(.+)$")
-        profiles: list[str] = []
-    
-        dir = memcard.dir_open("/")
-        try:
-            for ent in dir:
-                mode = ent[0]
-    
-                if (mode & DF_EXISTS) == 0:
-                    continue
-    
-                name = ent[8].decode("ascii", errors="ignore")
-    
-                if (mode & DF_DIR):
-                    match = profile_pattern.match(name)
-                    if match:
-                        profiles.append(match.group(1))
-        finally:
-            dir.close()
-    
-        return profiles
+        return find_profiles(cast(ps2mc, self.state.memcard))
 
     def show_error_dlg(self, error: str) -> None:
         QMessageBox.critical(self, "Error", error)
@@ -328,11 +1032,21 @@ class MemcardSelect(QWidget):
         path_layout.addWidget(browse_btn)
     
         layout.addRow("Memory Card:", path_layout)
+
+        # Only the game's saves instead of the whole card, full checks are remembered per image anyway
+        self.quick_check = QCheckBox("Quick check")
+        self.quick_check.setChecked(self.state.history.quick_check)
+        layout.addRow(self.quick_check)
     
         # Submit button (spans full width)
-        submit_btn = QPushButton("Next")
-        submit_btn.clicked.connect(lambda: self.submit(self.path_edit.text()))
-        layout.addRow(submit_btn)
+        self.submit_btn = QPushButton("Next")
+        self.submit_btn.clicked.connect(lambda: self.submit(self.path_edit.text()))
+        layout.addRow(self.submit_btn)
+
+        # Many cards and profiles at once instead of one at a time
+        workspace_btn = QPushButton("Workspace")
+        workspace_btn.clicked.connect(self.goto_workspace)
+        layout.addRow(workspace_btn)
 
     def submit(self, path_text: str) -> None:
         path_text = path_text.strip()
@@ -342,10 +1056,40 @@ class MemcardSelect(QWidget):
             self.show_error_dlg(result)
             return
     
+        # The full check reads the whole card, keep it off the GUI thread
         memcard_path = Path(path_text)
-        self.commit(memcard_path)
+        quick = self.quick_check.isChecked()
+        self.state.workspace.close_card(memcard_path)
+        self.submit_btn.setEnabled(False)
+        self.state.run_job(
+            lambda job: self.open_memcard(memcard_path, quick),
+            on_result=lambda opened: self.opened(memcard_path, *opened),
+            on_error=self.failed,
+        )
+
+    def opened(self, memcard_path: Path, f: BufferedRandom, memcard: ps2mc, valid: bool) -> None:
+        self.submit_btn.setEnabled(True)
+        if not valid:
+            reply = QMessageBox.question(
+                self,
+                "Memory card has errors",
+                (
+                    "The file system check found problems in this memory card, like lost clusters.\n\n"
+                    "Open it anyway? Keep a backup before packing races into it."
+                ),
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if reply != QMessageBox.StandardButton.Yes:
+                memcard.close()
+                f.close()
+                return
+        self.commit(memcard_path, f, memcard)
         self.next()
 
+    def failed(self, error: str) -> None:
+        self.submit_btn.setEnabled(True)
+        self.show_error_dlg(error)
+
     # if None, OK
     # else, error message
     def validate(self, path_text: str) -> None | str:
@@ -359,22 +1103,31 @@ class MemcardSelect(QWidget):
         if not memcard_path.exists() or not memcard_path.is_file():
             return "The memory card path does not exist!"
     
-        try:
-            with open(memcard_path, "rb") as f:
-                memcard = ps2mc(f)
-                memcard.check()
-        except Exception:
-            return "Memory card not valid!"
-    
         return None
 
+    @staticmethod
+    def open_memcard(memcard_path: Path, quick: bool) -> tuple[BufferedRandom, ps2mc, bool]:
+        # The card stays open for the session. A check that finds problems, like
+        # lost clusters, doesn't stop it from opening, the caller warns about it.
+        f = open(memcard_path, "r+b")
+        try:
+            memcard = ps2mc(f)
+            valid = check_memcard(memcard, str(memcard_path), quick)
+            # Every view after this one picks profiles from the catalog
+            get_profile_catalog(memcard)
+        except Exception as e:
+            f.close()
+            raise Exception(f"Memory card not valid! {e}") from e
+        return f, memcard, valid
+
     
     def show_error_dlg(self, error: str) -> None:
         QMessageBox.critical(self, "Error", error)
 
-    def commit(self, memcard_path: Path) -> None:
-        self.state.memcard = memcard_path
+    def commit(self, memcard_path: Path, f: BufferedRandom, memcard: ps2mc) -> None:
+        self.state.use_memcard(memcard_path, f, memcard)
         self.state.history.memcard_path = memcard_path
+        self.state.history.quick_check = self.quick_check.isChecked()
 
     def open_file_dlg(self) -> None:
         dir = Path(self.path_edit.text()).parent
@@ -394,6 +1147,10 @@ class MemcardSelect(QWidget):
         next_widget = ProfileSelect(self.state)
         self.state.windowPushed.emit(next_widget)
 
+    def goto_workspace(self) -> None:
+        self.state.history.quick_check = self.quick_check.isChecked()
+        self.state.windowPushed.emit(WorkspaceView(self.state))
+
 class ActionSelect(QWidget):
     state: AppState
     def __init__(self, state: AppState):
@@ -455,7 +1212,6 @@ class ExtractView(QWidget):
         main_layout.addLayout(dir_layout)
 
         self.table = QTableView()
-        self.table.setModel(self.build_race_model())
         self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self.table.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
         self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
@@ -479,6 +1235,9 @@ class ExtractView(QWidget):
 
         main_layout.addLayout(btn_layout)
 
+        self.table.setModel(race_proxy_model(self.state.race_model, self))
+        self.state.load_races(lambda error: QMessageBox.critical(self, "Error", error))
+
     def open_directory_dlg(self) -> None:
         dir = Path(self.dir_edit.text())
         dir_txt = str(dir) if dir.exists() else ""
@@ -510,7 +1269,10 @@ class ExtractView(QWidget):
             QMessageBox.critical(self, "Error", "No races selected.")
             return
 
-        races = tuple(index.data() for index in selected_indexes)
+        races = [
+            (index.siblingAtColumn(1).data(), index.siblingAtColumn(2).data())
+            for index in selected_indexes
+        ]
 
         self.extract_selected(races, Path(path_text))
 
@@ -523,48 +1285,55 @@ class ExtractView(QWidget):
 
         self.extract_all(Path(path_text))
 
-    def build_race_model(self) -> QStandardItemModel: 
-        memcard = self.state.memcard 
-        profile = self.state.profile 
-        racefile = get_races_file(memcard, profile) 
-        race_info = get_all_race_info(racefile) # Create the model 
-        model = QStandardItemModel() 
-        model.setHorizontalHeaderLabels(["Name", "City", "Slot", "Offset"]) 
-
-        for name, offset, city, code in race_info:
-            name_item = QStandardItem(name)
-            city_item = QStandardItem(city)
-        
-            # Convert to int for sorting
-            code_item = QStandardItem()
-            code_item.setData(code, Qt.ItemDataRole.DisplayRole)  # display and sort as number
+    def extract_selected(self, races: list[tuple[str, int]], directory: Path) -> None:
+        self.run_extract(races, directory)
 
-            # Offset column displayed as hex but sorted numerically
-            offset_item = QStandardItem(f"0x{offset:04X}")  # display as hex
-            offset_item.setData(offset, Qt.ItemDataRole.UserRole)  # numeric value for sorting
+    def extract_all(self, directory: Path) -> None:
+        self.run_extract(all_race_slots(), directory)
 
-            model.appendRow([name_item, city_item, code_item, offset_item])
+    def run_extract(self, races: list[RaceSelector], directory: Path) -> None:
+        memcard = cast(ps2mc, self.state.memcard)
+        profile = cast(str, self.state.profile)
+        self.state.history.extract_output_directory = directory
 
-        return model
+        dialog = QProgressDialog("Extracting races...", "Cancel", 0, len(races), self)
+        dialog.setWindowTitle("Extract")
+        dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        dialog.setMinimumDuration(300)
 
-    def extract_selected(self, races: tuple[str], directory: Path) -> None:
-        memcard = self.state.memcard
-        profile = self.state.profile
+        def finish(results: list[ExtractResult]) -> None:
+            dialog.reset()
+            self.show_extract_results(results, directory)
 
-        for race in races:
-            extract_from_name(memcard, profile, race, None, str(directory) + "/")
-        self.state.history.extract_output_directory = directory
-        
-        QMessageBox.information(self, "Success!", f"Races extracted at {directory}")
+        def fail(error: str) -> None:
+            dialog.reset()
+            QMessageBox.critical(self, "Error", error)
 
-    def extract_all(self, directory: Path) -> None:
-        memcard = self.state.memcard
-        profile = self.state.profile
+        def cancel() -> None:
+            dialog.reset()
+            QMessageBox.information(self, "Cancelled", f"Extraction cancelled, some races may already be at {directory}")
 
-        extract_all(memcard, profile, str(directory))
-        self.state.history.extract_output_directory = directory
+        job = self.state.run_job(
+            lambda job: extract_many(memcard, profile, races, str(directory), progress=job.progress),
+            on_result=finish,
+            on_error=fail,
+            on_progress=lambda done, total: dialog.setValue(done),
+            on_cancel=cancel,
+        )
+        dialog.canceled.connect(job.cancel)
 
-        QMessageBox.information(self, "Success!", f"Races extracted at {directory}")
+    def show_extract_results(self, results: list[ExtractResult], directory: Path) -> None:
+        failed = [result for result in results if result.error is not None]
+        if not failed:
+            QMessageBox.information(self, "Success!", f"Races extracted at {directory}")
+            return
+
+        lines = [f"{result.selector}: {result.error}" for result in failed]
+        QMessageBox.warning(
+            self,
+            "Some races failed",
+            f"{len(results) - len(failed)} of {len(results)} races extracted at {directory}\n\n" + "\n".join(lines)
+        )
 
 class PackView(QWidget):
     state: AppState
@@ -577,14 +1346,14 @@ class PackView(QWidget):
         main_layout = QVBoxLayout(self)
 
         self.table = QTableView()
-        self.table.setModel(self.build_race_model())
         self.table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
-        self.table.setSelectionMode(QTableView.SelectionMode.NoSelection)
         self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
         self.table.setSortingEnabled(True)
         self.table.verticalHeader().setVisible(False)
         self.table.horizontalHeader().setStretchLastSection(True)
-        main_layout.addWidget(QLabel("Current Races on Memory Card:"))
+        enable_race_drag_drop(self.table)
+        self.state.race_model.slotDropped.connect(self.race_dropped)
+        main_layout.addWidget(QLabel("Current Races on Memory Card (drag to move, Ctrl to copy):"))
         main_layout.addWidget(self.table)
 
         form_layout = QFormLayout()
@@ -612,18 +1381,64 @@ class PackView(QWidget):
 
         main_layout.addLayout(form_layout)
 
-        submit_btn = QPushButton("Pack Race")
-        submit_btn.clicked.connect(self.submit)  # directly call submit
+        # Races queued to be packed together with a single write
+        self.batch: list[PackItem] = []
+        self.batch_list = QListWidget()
+        self.batch_list.setMaximumHeight(80)
+        main_layout.addWidget(QLabel("Batch:"))
+        main_layout.addWidget(self.batch_list)
+
+        batch_layout = QHBoxLayout()
+        add_btn = QPushButton("Add to Batch")
+        add_btn.clicked.connect(self.add_to_batch)
+        clear_btn = QPushButton("Clear Batch")
+        clear_btn.clicked.connect(self.clear_batch)
+        batch_layout.addWidget(add_btn)
+        batch_layout.addWidget(clear_btn)
+        main_layout.addLayout(batch_layout)
+
+        # Whole folders of races, to the empty slots of each city unless a first slot is picked
+        import_layout = QHBoxLayout()
+        self.import_from_slot = QCheckBox("From slot:")
+        self.import_first_slot = QSpinBox()
+        self.import_first_slot.setRange(0, RACE_QTD - 1)
+        self.import_first_slot.setEnabled(False)
+        self.import_from_slot.toggled.connect(self.import_first_slot.setEnabled)
+        self.import_policy = QComboBox()
+        self.import_policy.addItems(COLLISION_POLICIES)
+        self.import_btn = QPushButton("Import Folder")
+        self.import_btn.clicked.connect(self.import_directory)
+        import_layout.addWidget(self.import_from_slot)
+        import_layout.addWidget(self.import_first_slot)
+        import_layout.addWidget(QLabel("Taken names:"))
+        import_layout.addWidget(self.import_policy)
+        import_layout.addWidget(self.import_btn)
+        main_layout.addLayout(import_layout)
+
+        self.submit_btn = QPushButton("Pack Race")
+        self.submit_btn.clicked.connect(self.submit)  # directly call submit
         #main_layout.addWidget(submit_btn, alignment=Qt.AlignmentFlag.AlignRight)
-        main_layout.addWidget(submit_btn)
+        main_layout.addWidget(self.submit_btn)
 
         if self.state.history.pack_race_file is not None:
             self.set_file(str(self.state.history.pack_race_file))
 
+        self.table.setModel(race_proxy_model(self.state.race_model, self))
+        self.submit_btn.setEnabled(self.state.race_index is not None)
+        self.state.racesLoaded.connect(self.races_loaded)
+        self.state.load_races(self.show_error_dlg)
+
+    def races_loaded(self) -> None:
+        self.submit_btn.setEnabled(True)
+
     def submit(self) -> None:
         """
         Gather inputs from widgets and run validation + confirmation + pack
         """
+        if self.batch:
+            self.show_are_you_sure_dlg(list(self.batch))
+            return
+
         file_text = self.file_edit.text().strip()  # string path
         position = self.slot_spin.value()
         new_name = self.race_name.text().strip()  # could add QLineEdit for custom name if desired
@@ -635,7 +1450,28 @@ class PackView(QWidget):
 
         self.state.history.pack_race_file = Path(file_text)
 
-        self.show_are_you_sure_dlg(file_text, position, new_name)
+        self.show_are_you_sure_dlg([(file_text, position, new_name)])
+
+    def add_to_batch(self) -> None:
+        file_text = self.file_edit.text().strip()
+        position = self.slot_spin.value()
+        new_name = self.race_name.text().strip()
+
+        error = self.validate(file_text, position, new_name)
+        if error:
+            self.show_error_dlg(error)
+            return
+
+        self.state.history.pack_race_file = Path(file_text)
+
+        self.batch.append((file_text, position, new_name))
+        self.batch_list.addItem(f"{os.path.basename(file_text)} -> slot {position} as '{new_name}'")
+        self.submit_btn.setText(f"Pack {len(self.batch)} Races")
+
+    def clear_batch(self) -> None:
+        self.batch.clear()
+        self.batch_list.clear()
+        self.submit_btn.setText("Pack Race")
 
     def validate(self, file: str, position: int, new_name: str) -> None | str:
         path = Path(file)
@@ -668,25 +1504,117 @@ class PackView(QWidget):
         city_bytes = file_contents[0x8:0xF]
         city = city_bytes.decode("ascii").strip("\0")
 
-        # Load memory card races
-        racefile = bytearray(get_races_file(cast(ps2mc, self.state.memcard), cast(str, self.state.profile)))
         race_loc = get_offset_from_city_and_code(city, position)
 
         # Duplicate name validation
-        all_race_names_and_idx = get_all_race_info(racefile)
-        if new_name is not None:
-            for name, offset, city_dup, code_dup in all_race_names_and_idx:
-                if name == new_name and offset != race_loc:
-                    return f"There's already a race named '{new_name}' at {city_dup}_{code_dup}. Choose a different name."
+        index = self.state.race_index
+        if index is None:
+            return "The races are still loading, try again in a moment."
+        for record in index.find_all(new_name):
+            if record.offset != race_loc:
+                return f"There's already a race named '{new_name}' at {record.city}_{record.slot}. Choose a different name."
+
+        # Races already queued count as taken too
+        for entry in load_pack_batch(self.batch):
+            if entry.city == city and entry.position == position:
+                return f"{os.path.basename(entry.filename)} is already queued for {city}_{position}."
+            if entry.name == new_name:
+                return f"A race named '{new_name}' is already queued. Choose a different name."
 
         return None
 
-    def pack(self, file: str, position: int, new_name: str | None) -> None:
-        memcard = self.state.memcard
-        profile = self.state.profile
-        pack(memcard, profile, str(file), position, new_name)
-        QMessageBox.information(self, "Success", "Race packed!")
-        self.table.setModel(self.build_race_model())
+    def race_dropped(self, src_card: str, src: SlotRef, dst_card: str, dst: SlotRef, copy: bool) -> None:
+        # Undo puts it back, so no are-you-sure here
+        if src_card != dst_card:
+            self.show_error_dlg("Races only move between cards in the workspace.")
+            return
+        self.state.move_race(src, dst, copy, on_error=self.show_error_dlg)
+
+    def pack(self, races: list[PackItem]) -> None:
+        def packed(result: tuple[list[RaceRecord], RaceTable, RaceIndex]) -> None:
+            self.state.races_packed(*result)
+            self.submit_btn.setEnabled(True)
+            self.clear_batch()
+            QMessageBox.information(self, "Success", "Race packed!" if len(races) == 1 else f"{len(races)} races packed!")
+
+        def failed(error: str) -> None:
+            self.submit_btn.setEnabled(True)
+            self.show_error_dlg(error)
+
+        # Runs on the card pool, so it never overlaps another read or write
+        self.submit_btn.setEnabled(False)
+        self.state.run_write_job(
+            lambda memcard, profile: pack_many(memcard, profile, races),
+            on_result=packed,
+            on_error=failed,
+        )
+
+    def import_directory(self) -> None:
+        directory = QFileDialog.getExistingDirectory(self, "Select Race Folder", str(Path(self.file_edit.text()).parent))
+        if not directory:
+            return
+
+        memcard = cast(ps2mc, self.state.memcard)
+        profile = cast(str, self.state.profile)
+        slots = range(self.import_first_slot.value(), RACE_QTD) if self.import_from_slot.isChecked() else None
+        policy = self.import_policy.currentText()
+
+        def plan(job: Job) -> tuple[list[PackBatchEntry], list[str]]:
+            table = get_race_table(memcard, profile)
+            batch = plan_directory_import(table, find_race_files(directory), slots, policy)
+            replaced = []
+            for entry in batch:
+                old = table.at(entry.city, entry.position).name
+                if old:
+                    replaced.append(f"{entry.city}_{entry.position} {old} -> {entry.name}")
+            return batch, replaced
+
+        def planned(result: tuple[list[PackBatchEntry], list[str]]) -> None:
+            batch, replaced = result
+            if not batch:
+                self.import_btn.setEnabled(True)
+                QMessageBox.information(self, "Nothing to pack", f"No races to pack from {directory}")
+                return
+            per_city = ", ".join(
+                f"{sum(entry.city == city for entry in batch)} in {CITY_NAMES[city]}"
+                for city in CITIES if any(entry.city == city for entry in batch)
+            )
+            replacing = f"\n\n{len(replaced)} races will be replaced:\n" + "\n".join(replaced) if replaced else ""
+            reply = QMessageBox.question(
+                self,
+                "Are you sure?",
+                (
+                    f"{len(batch)} races will be packed ({per_city}) and your save game "
+                    f"may become corrupted.{replacing}\n\n"
+                    "Are you REALLY sure you want to do it?\n"
+                    "The memory card is snapshotted first, see racist snapshots to restore it."
+                ),
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if reply != QMessageBox.StandardButton.Yes:
+                self.import_btn.setEnabled(True)
+                return
+            self.state.run_write_job(
+                lambda memcard, profile: pack_batch(memcard, profile, batch),
+                on_result=packed,
+                on_error=failed,
+            )
+
+        def packed(result: tuple[list[RaceRecord], RaceTable, RaceIndex]) -> None:
+            self.state.races_packed(*result)
+            self.import_btn.setEnabled(True)
+            QMessageBox.information(self, "Success", f"{len(result[0])} races packed!")
+
+        def failed(error: str) -> None:
+            self.import_btn.setEnabled(True)
+            self.show_error_dlg(error)
+
+        self.import_btn.setEnabled(False)
+        self.state.run_job(
+            plan,
+            on_result=planned,
+            on_error=failed,
+        )
 
     def open_file_dlg(self) -> None:
         dir = Path(self.file_edit.text()).parent
@@ -714,50 +1642,168 @@ class PackView(QWidget):
     def show_error_dlg(self, error: str) -> None:
         QMessageBox.critical(self, "Error", error)
 
-    def build_race_model(self) -> QStandardItemModel:
-        memcard = self.state.memcard
-        profile = self.state.profile
-        racefile = get_races_file(memcard, profile)
-        race_info = get_all_race_info(racefile)
-    
-        # Create the model
-        model = QStandardItemModel()
-        model.setHorizontalHeaderLabels(["Name", "City", "Slot", "Offset"])
-
-        for name, offset, city, code in race_info:
-            name_item = QStandardItem(name)
-            city_item = QStandardItem(city)
-        
-            # Convert to int for sorting
-            code_item = QStandardItem()
-            code_item.setData(code, Qt.ItemDataRole.DisplayRole)  # display and sort as number
-
-            # Offset column displayed as hex but sorted numerically
-            offset_item = QStandardItem(f"0x{offset:04X}")  # display as hex
-            offset_item.setData(offset, Qt.ItemDataRole.UserRole)  # numeric value for sorting
-
-            model.appendRow([name_item, city_item, code_item, offset_item])
-
-    
-        return model
-
-    def show_are_you_sure_dlg(self, file: str, position: int, new_name: str | None) -> None:
+    def show_are_you_sure_dlg(self, races: list[PackItem]) -> None:
+        slots = "This race slot" if len(races) == 1 else f"{len(races)} race slots"
         reply = QMessageBox.question(
             self,
             "Are you sure?",
             (
-                "This race slot will be overridden and your save game "
+                f"{slots} will be overridden and your save game "
                 "may become corrupted.\n\n"
                 "Are you REALLY sure you want to do it?\n"
-                "Please backup your memory card before proceeding."
+                "The memory card is snapshotted first, see racist snapshots to restore it."
             ),
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
 
         if reply == QMessageBox.StandardButton.Yes:
-            self.pack(file, position, new_name)
+            self.pack(races)
+
+class WorkspaceView(QWidget):
+    """
+    Every card of the workspace in a tree and every profile in a tab of its
+    own. Races are dragged between any two tables, the tab bar switches tabs
+    while dragging over it.
+    """
+    state: AppState
+
+    def __init__(self, state: AppState):
+        super().__init__()
+        self.state = state
+        self.workspace = state.workspace
+        self.card_items: dict[str, QTreeWidgetItem] = {}
+        self.tables: dict[tuple[str, str], QTableView] = {}
+
+        layout = QVBoxLayout(self)
+
+        buttons = QHBoxLayout()
+        add_btn = QPushButton("Add Cards")
+        add_btn.clicked.connect(self.open_file_dlg)
+        self.reopen_btn = QPushButton("Reopen Last")
+        self.reopen_btn.setEnabled(bool(self.state.history.workspace_cards))
+        self.reopen_btn.clicked.connect(lambda: self.open_cards(self.state.history.workspace_cards))
+        close_btn = QPushButton("Close All")
+        close_btn.clicked.connect(self.workspace.close)
+        buttons.addWidget(add_btn)
+        buttons.addWidget(self.reopen_btn)
+        buttons.addWidget(close_btn)
+        layout.addLayout(buttons)
+
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(["Card / Profile", "Races"])
+        self.tree.itemClicked.connect(self.show_item)
+
+        self.tabs = QTabWidget()
+        self.tabs.tabBar().setChangeCurrentOnDrag(True)
+        self.tabs.tabBar().setAcceptDrops(True)
+
+        splitter = QSplitter(Qt.Orientation.Horizontal)
+        splitter.addWidget(self.tree)
+        splitter.addWidget(self.tabs)
+        splitter.setStretchFactor(1, 1)
+        layout.addWidget(splitter, stretch=1)
+
+        self.workspace.cardOpened.connect(self.card_opened)
+        self.workspace.cardFailed.connect(self.card_failed)
+        self.workspace.cardClosed.connect(self.card_closed)
+        self.workspace.racesLoaded.connect(self.races_loaded)
+
+        # Cards still open from the last visit to this view
+        for session in list(self.workspace.cards.values()):
+            if session.memcard is not None:
+                self.card_opened(session)
+                for profile in session.models:
+                    self.races_loaded(session, profile)
+
+    def open_file_dlg(self) -> None:
+        dir = self.state.history.memcard_path.parent if self.state.history.memcard_path is not None else Path()
+        paths, _ = QFileDialog.getOpenFileNames(
+            self,
+            "Select PS2 Memory Cards",
+            str(dir) if dir.exists() else "",
+            "PS2 Memory Card (*.ps2 *.bin);;All Files (*)"
+        )
+        if paths:
+            self.open_cards([Path(path) for path in paths])
+
+    def open_cards(self, paths: list[Path]) -> None:
+        self.workspace.open_cards(paths, self.state.history.quick_check)
+
+    def card_opened(self, session: CardSession) -> None:
+        item = QTreeWidgetItem([os.path.basename(session.path), ""])
+        item.setToolTip(0, session.path)
+        self.tree.addTopLevelItem(item)
+        self.card_items[session.path] = item
+
+        for profile, model in session.models.items():
+            child = QTreeWidgetItem([profile, "loading"])
+            child.setData(0, Qt.ItemDataRole.UserRole, (session.path, profile))
+            item.addChild(child)
+
+            table = QTableView()
+            table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+            table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+            table.setSortingEnabled(True)
+            table.verticalHeader().setVisible(False)
+            table.horizontalHeader().setStretchLastSection(True)
+            table.setModel(race_proxy_model(model, table))
+            enable_race_drag_drop(table)
+            model.slotDropped.connect(self.race_dropped)
+            model.dataChanged.connect(self.model_changed)
+            self.tables[(session.path, profile)] = table
+            self.tabs.addTab(table, f"{Path(session.path).stem}/{profile}")
+        item.setExpanded(True)
+
+        # Reopen Last brings back the cards open now
+        self.state.history.workspace_cards = [
+            Path(path) for path, open_session in self.workspace.cards.items() if open_session.memcard is not None
+        ]
+        self.reopen_btn.setEnabled(True)
+
+    def races_loaded(self, session: CardSession, profile: str) -> None:
+        self.update_count(session.models[profile])
+
+    def model_changed(self) -> None:
+        self.update_count(cast(RaceModel, self.sender()))
+
+    def update_count(self, model: RaceModel) -> None:
+        # Slots holding a race, next to the profile in the tree
+        item = self.card_items.get(str(model.card))
+        if item is None:
+            return
+        for i in range(item.childCount()):
+            child = item.child(i)
+            if child.text(0) == model.profile:
+                used = sum(1 for row in range(model.rowCount()) if model.index(row, 0).data())
+                child.setText(1, str(used))
+
+    def card_failed(self, path: str, error: str) -> None:
+        QMessageBox.critical(self, "Error", f"{os.path.basename(path)}: {error}")
+
+    def card_closed(self, path: str) -> None:
+        item = self.card_items.pop(path, None)
+        if item is not None:
+            self.tree.takeTopLevelItem(self.tree.indexOfTopLevelItem(item))
+        for key in [key for key in self.tables if key[0] == path]:
+            table = self.tables.pop(key)
+            self.tabs.removeTab(self.tabs.indexOf(table))
+            table.deleteLater()
+
+    def show_item(self, item: QTreeWidgetItem) -> None:
+        key = item.data(0, Qt.ItemDataRole.UserRole)
+        if key is not None and tuple(key) in self.tables:
+            self.tabs.setCurrentWidget(self.tables[tuple(key)])
+
+    def race_dropped(self, src_card: str, src: SlotRef, dst_card: str, dst: SlotRef, copy: bool) -> None:
+        self.workspace.move_race(src_card, src, dst_card, dst, copy, on_error=self.show_error_dlg)
+
+    def show_error_dlg(self, error: str) -> None:
+        QMessageBox.critical(self, "Error", error)
 
 def main():
+    # Only the GUI needs the theme package, keep it out of the import of this module
+    import qt_themes
+
     app = QApplication()
     qt_themes.set_theme('monokai')
 
@@ -0,0 +1,193 @@
+# Undo/redo journal of a memory card, kept next to it as <card>.mc3journal
+#
+#   header   ">4sII"          magic, version, entries applied to the card
+#   entry    ">20s32s32sB"    profile, sha256 of file01 before and after, slot count
+#   slot     ">H"             racefile offset, then the old and the new RACE_SIZE block
+#
+# Only the slots a write changed are kept, so undoing a pack never needs a
+# copy of the whole image. Entries past the applied count can be redone until
+# the next write drops them.
+import hashlib
+import os
+import struct
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, NamedTuple
+
+from mymcplus.ps2mc import ps2mc
+
+from .core import (
+    RACE_SIZE, RaceRecord, all_race_slots, get_city_and_code_from_race_loc, get_offset_from_city_and_code,
+    get_race_name, get_races_file, read_races_file, write_races_file
+)
+
+JOURNAL_MAGIC   = b'RAJN'
+JOURNAL_VERSION = 1
+JOURNAL_EXT     = ".mc3journal"
+
+# Longest profile name an entry can hold
+PROFILE_LEN = 20
+
+HEADER = struct.Struct(">4sII")
+ENTRY  = struct.Struct(f">{PROFILE_LEN}s32s32sB")
+SLOT   = struct.Struct(">H")
+
+class SlotDelta(NamedTuple):
+    offset: int
+    old: bytes
+    new: bytes
+
+class JournalEntry(NamedTuple):
+    profile: str
+    before: bytes
+    after: bytes
+    slots: list[SlotDelta]
+
+    def records(self) -> list[RaceRecord]:
+        """The slots of the entry, named as they are after the write."""
+        records = []
+        for delta in self.slots:
+            city, code = get_city_and_code_from_race_loc(delta.offset)
+            records.append(RaceRecord(get_race_name(delta.new, 0), delta.offset, city, code))
+        return records
+
+def journal_path(card: str) -> str:
+    return f"{card}{JOURNAL_EXT}"
+
+def racefile_hash(racefile: bytes | bytearray) -> bytes:
+    return hashlib.sha256(racefile).digest()
+
+def slot_deltas(old: bytes | bytearray, new: bytes | bytearray) -> list[SlotDelta]:
+    deltas = []
+    for city, code in all_race_slots():
+        offset = get_offset_from_city_and_code(city, code)
+        old_block = bytes(old[offset : offset + RACE_SIZE])
+        new_block = bytes(new[offset : offset + RACE_SIZE])
+        if old_block != new_block:
+            deltas.append(SlotDelta(offset, old_block, new_block))
+    return deltas
+
+class Journal:
+    """Undo/redo history of one card. The file is opened for each call, so a journal can outlive the card."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _read_index(self, f: BinaryIO) -> tuple[int, list[int]]:
+        # Applied count and the file offset of every entry, blocks are skipped
+        header = f.read(HEADER.size)
+        if not header:
+            return 0, []
+        if len(header) != HEADER.size:
+            raise Exception(f"{self.path} is not an undo journal!")
+        magic, version, applied = HEADER.unpack(header)
+        if magic != JOURNAL_MAGIC:
+            raise Exception(f"{self.path} is not an undo journal!")
+        if version != JOURNAL_VERSION:
+            raise Exception(f"{self.path} is a version {version} undo journal, only version {JOURNAL_VERSION} is supported!")
+
+        offsets = []
+        size = os.fstat(f.fileno()).st_size
+        position = HEADER.size
+        while position < size:
+            f.seek(position)
+            entry = f.read(ENTRY.size)
+            if len(entry) != ENTRY.size:
+                raise Exception(f"{self.path} is truncated!")
+            offsets.append(position)
+            position += ENTRY.size + entry[-1] * (SLOT.size + 2 * RACE_SIZE)
+        if position != size:
+            raise Exception(f"{self.path} is truncated!")
+        return min(applied, len(offsets)), offsets
+
+    def _read_entry(self, f: BinaryIO, offset: int) -> JournalEntry:
+        f.seek(offset)
+        profile_bytes, before, after, count = ENTRY.unpack(f.read(ENTRY.size))
+        slots = []
+        for _ in range(count):
+            (race_loc,) = SLOT.unpack(f.read(SLOT.size))
+            old = f.read(RACE_SIZE)
+            new = f.read(RACE_SIZE)
+            slots.append(SlotDelta(race_loc, old, new))
+        return JournalEntry(profile_bytes.rstrip(b'\x00').decode('ascii'), before, after, slots)
+
+    def _open(self) -> BinaryIO:
+        return open(self.path, "r+b" if os.path.exists(self.path) else "w+b")
+
+    def state(self) -> tuple[int, int]:
+        """(entries that can be undone, entries that can be redone)"""
+        if not os.path.exists(self.path):
+            return 0, 0
+        with open(self.path, "rb") as f:
+            applied, offsets = self._read_index(f)
+        return applied, len(offsets) - applied
+
+    def entries(self) -> list[JournalEntry]:
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "rb") as f:
+            _, offsets = self._read_index(f)
+            return [self._read_entry(f, offset) for offset in offsets]
+
+    def record(self, profile: str, before: bytes | bytearray, after: bytes | bytearray) -> JournalEntry | None:
+        """Append the slots that changed between two racefiles, dropping anything that could be redone."""
+        deltas = slot_deltas(before, after)
+        if not deltas:
+            return None
+        profile_bytes = profile.encode('ascii')
+        if len(profile_bytes) > PROFILE_LEN:
+            raise Exception(f"Profile name {profile} is too long for the undo journal!")
+
+        entry = JournalEntry(profile, racefile_hash(before), racefile_hash(after), deltas)
+        with self._open() as f:
+            applied, offsets = self._read_index(f)
+            end = offsets[applied] if applied < len(offsets) else max(f.seek(0, os.SEEK_END), HEADER.size)
+            f.seek(end)
+            f.truncate()
+            f.write(ENTRY.pack(profile_bytes, entry.before, entry.after, len(deltas)))
+            f.write(b"".join(SLOT.pack(delta.offset) + delta.old + delta.new for delta in deltas))
+            f.seek(0)
+            f.write(HEADER.pack(JOURNAL_MAGIC, JOURNAL_VERSION, applied + 1))
+        return entry
+
+    @contextmanager
+    def track(self, memcard: ps2mc, *profiles: str) -> Iterator[None]:
+        """Journal every slot the block writes to profiles, one entry per profile. Nothing is recorded if it raises."""
+        before = {profile: get_races_file(memcard, profile) for profile in profiles}
+        yield
+        for profile, racefile in before.items():
+            self.record(profile, racefile, get_races_file(memcard, profile))
+
+    def undo(self, memcard: ps2mc, profile: str | None = None) -> JournalEntry:
+        """Put back the old blocks of the last applied entry, only if the racefile is still as that entry left it."""
+        return self._apply(memcard, profile, undo=True)
+
+    def redo(self, memcard: ps2mc, profile: str | None = None) -> JournalEntry:
+        return self._apply(memcard, profile, undo=False)
+
+    def _apply(self, memcard: ps2mc, profile: str | None, undo: bool) -> JournalEntry:
+        action = "undo" if undo else "redo"
+        if not os.path.exists(self.path):
+            raise Exception(f"Nothing to {action}!")
+
+        with open(self.path, "r+b") as f:
+            applied, offsets = self._read_index(f)
+            index = applied - 1 if undo else applied
+            if not 0 <= index < len(offsets):
+                raise Exception(f"Nothing to {action}!")
+            entry = self._read_entry(f, offsets[index])
+            if profile is not None and entry.profile != profile:
+                raise Exception(f"The last change to {action} was made to profile {entry.profile}, not {profile}!")
+
+            # Goes to the card, the cached racefile may not know about other tools
+            racefile = bytearray(read_races_file(memcard, entry.profile))
+            expected = entry.after if undo else entry.before
+            if racefile_hash(racefile) != expected:
+                raise Exception(f"The save game of {entry.profile} changed since, can't {action} safely!")
+
+            for delta in entry.slots:
+                racefile[delta.offset : delta.offset + RACE_SIZE] = delta.old if undo else delta.new
+            write_races_file(memcard, entry.profile, racefile, [(delta.offset, RACE_SIZE) for delta in entry.slots])
+
+            f.seek(0)
+            f.write(HEADER.pack(JOURNAL_MAGIC, JOURNAL_VERSION, index if undo else index + 1))
+        return entry
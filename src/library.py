@@ -0,0 +1,168 @@
+# Local race library, every race block is stored once under the sha256 of its bytes
+# and a SQLite index remembers every card, profile and slot it was seen at
+import hashlib
+import sqlite3
+import time
+from typing import Iterable, NamedTuple
+
+from mymcplus.ps2mc import ps2mc
+
+from .core import (
+    CITIES_ADDR, RACE_SIZE, PackBatchEntry, RaceRecord, RaceSelector, RaceSlot, make_batch_entry,
+    pack_batch, select_race_blocks
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blocks (
+    hash  TEXT PRIMARY KEY,
+    block BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS races (
+    hash       TEXT NOT NULL REFERENCES blocks(hash),
+    name       TEXT NOT NULL,
+    city       TEXT NOT NULL,
+    card       TEXT NOT NULL,
+    profile    TEXT NOT NULL,
+    slot       INTEGER NOT NULL,
+    first_seen REAL NOT NULL,
+    UNIQUE (hash, card, profile, city, slot)
+);
+CREATE INDEX IF NOT EXISTS races_name ON races (name);
+CREATE INDEX IF NOT EXISTS races_hash ON races (hash);
+"""
+
+# Shortest hash prefix accepted when pulling a race
+MIN_PREFIX = 8
+
+# Hash or name of a library race, slot to store it at (None keeps the city slot
+# it was first seen at) and an optional new name
+LibraryItem = tuple[str, int | None, str | None]
+
+class LibraryRace(NamedTuple):
+    hash: str
+    name: str
+    city: str
+    card: str
+    profile: str
+    slot: int
+    first_seen: float
+
+def hash_prefix_range(key: str) -> tuple[str, str] | None:
+    """Bounds of the hashes starting with key, None when key is too short or not hex."""
+    prefix = key.lower()
+    if len(prefix) < MIN_PREFIX or not all(c in "0123456789abcdef" for c in prefix):
+        return None
+    # Hex digests sort below "g", so the range holds every hash starting with prefix
+    return prefix, prefix + "g"
+
+def race_hash(block: bytes | memoryview) -> str:
+    return hashlib.sha256(block).hexdigest()
+
+class Library:
+    def __init__(self, path: str):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def __enter__(self) -> "Library":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM blocks").fetchone()[0]
+
+    def add(self, races: Iterable[RaceSlot], card: str, profile: str) -> list[str]:
+        """Store races seen at card/profile, blocks already in the library are not stored again."""
+        now = time.time()
+        hashes = []
+        with self.db:
+            for race in races:
+                block = bytes(race.block)
+                digest = race_hash(block)
+                self.db.execute("INSERT OR IGNORE INTO blocks (hash, block) VALUES (?, ?)", (digest, block))
+                self.db.execute(
+                    "INSERT OR IGNORE INTO races (hash, name, city, card, profile, slot, first_seen) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (digest, race.name, race.city, card, profile, race.slot, now),
+                )
+                hashes.append(digest)
+        return hashes
+
+    def block(self, digest: str) -> bytes:
+        row = self.db.execute("SELECT block FROM blocks WHERE hash = ?", (digest,)).fetchone()
+        if row is None:
+            raise Exception(f"Race {digest} is not in the library!")
+        return row[0]
+
+    def sightings(self, digest: str) -> list[LibraryRace]:
+        rows = self.db.execute("SELECT * FROM races WHERE hash = ? ORDER BY first_seen", (digest,))
+        return [LibraryRace(*row) for row in rows]
+
+    def find(self, name: str) -> list[LibraryRace]:
+        """Every sighting of races with this exact name, oldest first."""
+        rows = self.db.execute("SELECT * FROM races WHERE name = ? ORDER BY first_seen", (name,))
+        return [LibraryRace(*row) for row in rows]
+
+    def search(self, pattern: str) -> list[LibraryRace]:
+        """One row per distinct race whose name matches a SQL LIKE pattern, like 'DRIFT%'."""
+        rows = self.db.execute(
+            "SELECT hash, name, city, card, profile, slot, MIN(first_seen) FROM races"
+            " WHERE name LIKE ? GROUP BY hash ORDER BY name",
+            (pattern,),
+        )
+        return [LibraryRace(*row) for row in rows]
+
+    def resolve(self, key: str) -> LibraryRace:
+        """First sighting of a race picked by hash, unique hash prefix or name."""
+        prefix_range = hash_prefix_range(key)
+        if prefix_range is not None:
+            hashes = [row[0] for row in self.db.execute(
+                "SELECT hash FROM blocks WHERE hash >= ? AND hash < ? LIMIT 2", prefix_range
+            )]
+            if len(hashes) > 1:
+                raise Exception(f"More than one race in the library starts with {key}! Use more of the hash.")
+            if hashes:
+                return self.sightings(hashes[0])[0]
+
+        found = self.find(key)
+        if not found:
+            raise Exception(f"Race {key} not found in the library!")
+        if len({race.hash for race in found}) > 1:
+            raise Exception(f"There's more than one race named {key} in the library! Pick one by hash.")
+        return found[0]
+
+def add_to_library(
+    library: Library,
+    memcard: ps2mc,
+    profile: str,
+    card: str,
+    selectors: Iterable[RaceSelector] | None = None,
+) -> list[str]:
+    """extract() into the library instead of loose files, every race when selectors is None."""
+    return library.add(select_race_blocks(memcard, profile, selectors), card, profile)
+
+def load_library_batch(library: Library, items: Iterable[LibraryItem]) -> list[PackBatchEntry]:
+    """Same as load_pack_batch, for races pulled out of the library."""
+    batch = []
+    for key, position, new_name in items:
+        race = library.resolve(key)
+        block = library.block(race.hash)
+        if len(block) != RACE_SIZE or race.city not in CITIES_ADDR:
+            raise Exception(f"Race {race.hash} is damaged in the library!")
+        if position is None:
+            position = race.slot
+        batch.append(make_batch_entry(f"library:{race.hash[:MIN_PREFIX]}", race.city, position, block, new_name))
+    return batch
+
+def pack_from_library(
+    memcard: ps2mc,
+    profile: str,
+    library: Library,
+    items: Iterable[LibraryItem],
+) -> list[RaceRecord]:
+    """pack_many for library races, the whole selection lands with a single write."""
+    return pack_batch(memcard, profile, load_library_batch(library, items))
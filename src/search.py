@@ -0,0 +1,173 @@
+# Search index over many memory cards, one row per race of every profile
+#
+# Cards are scanned in worker processes and only when their size or mtime
+# changed since the last run, so keeping a big tree of cards indexed is cheap.
+# Block hashes are the same sha256 the race library uses.
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterable, Iterator, NamedTuple
+
+from mymcplus.ps2mc import ps2mc
+
+from .core import get_profile_catalog, get_race_table
+from .fleet import find_memcards
+from .library import MIN_PREFIX, hash_prefix_range, race_hash
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cards (
+    path     TEXT PRIMARY KEY,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    scanned  REAL NOT NULL,
+    error    TEXT
+);
+CREATE TABLE IF NOT EXISTS races (
+    card    TEXT NOT NULL REFERENCES cards(path),
+    profile TEXT NOT NULL,
+    city    TEXT NOT NULL,
+    slot    INTEGER NOT NULL,
+    name    TEXT NOT NULL,
+    hash    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS races_card ON races (card);
+CREATE INDEX IF NOT EXISTS races_name ON races (name);
+CREATE INDEX IF NOT EXISTS races_hash ON races (hash);
+"""
+
+class SearchHit(NamedTuple):
+    card: str
+    profile: str
+    city: str
+    slot: int
+    name: str
+    hash: str
+
+class CardScan(NamedTuple):
+    path: str
+    size: int
+    mtime_ns: int
+    hits: list[SearchHit]
+    error: str | None = None
+
+class IndexUpdate(NamedTuple):
+    scanned: int
+    unchanged: int
+    removed: int
+    failed: int
+
+def scan_card(path: str) -> CardScan:
+    # Runs inside a worker process. The stat comes first, a card written
+    # during the scan is then scanned again next time.
+    size = mtime_ns = 0
+    hits = []
+    try:
+        stat = os.stat(path)
+        size, mtime_ns = stat.st_size, stat.st_mtime_ns
+        with open(path, "rb") as f:
+            memcard = ps2mc(f)
+            try:
+                for profile, entry in get_profile_catalog(memcard).items():
+                    if entry.size is None:
+                        continue
+                    for race in get_race_table(memcard, profile):
+                        if not race.name:
+                            continue
+                        hits.append(SearchHit(path, profile, race.city, race.slot, race.name, race_hash(race.block)))
+            finally:
+                memcard.close()
+    except Exception as e:
+        return CardScan(path, size, mtime_ns, [], str(e))
+    return CardScan(path, size, mtime_ns, hits)
+
+class SearchIndex:
+    def __init__(self, path: str):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def __enter__(self) -> "SearchIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM races").fetchone()[0]
+
+    def stale_cards(self, cards: Iterable[str]) -> list[str]:
+        """The cards that are new or whose size or mtime changed since they were indexed."""
+        known = {path: (size, mtime_ns) for path, size, mtime_ns in self.db.execute("SELECT path, size, mtime_ns FROM cards")}
+        stale = []
+        for card in cards:
+            try:
+                stat = os.stat(card)
+            except OSError:
+                # Gone or unreadable since it was found, the scan records why
+                stale.append(card)
+                continue
+            if known.get(card) != (stat.st_size, stat.st_mtime_ns):
+                stale.append(card)
+        return stale
+
+    def store(self, scan: CardScan) -> None:
+        with self.db:
+            self.db.execute("DELETE FROM races WHERE card = ?", (scan.path,))
+            self.db.executemany("INSERT INTO races (card, profile, city, slot, name, hash) VALUES (?, ?, ?, ?, ?, ?)", scan.hits)
+            self.db.execute(
+                "INSERT OR REPLACE INTO cards (path, size, mtime_ns, scanned, error) VALUES (?, ?, ?, ?, ?)",
+                (scan.path, scan.size, scan.mtime_ns, time.time(), scan.error),
+            )
+
+    def remove_missing(self) -> int:
+        """Forget the cards that are gone from the disk."""
+        gone = [path for (path,) in self.db.execute("SELECT path FROM cards") if not os.path.exists(path)]
+        with self.db:
+            for path in gone:
+                self.db.execute("DELETE FROM races WHERE card = ?", (path,))
+                self.db.execute("DELETE FROM cards WHERE path = ?", (path,))
+        return len(gone)
+
+    def errors(self) -> list[tuple[str, str]]:
+        return list(self.db.execute("SELECT path, error FROM cards WHERE error IS NOT NULL ORDER BY path"))
+
+    def find_name(self, pattern: str) -> list[SearchHit]:
+        """Every slot holding a race whose name matches a SQL LIKE pattern, like 'DRIFT%'."""
+        rows = self.db.execute(
+            "SELECT card, profile, city, slot, name, hash FROM races WHERE name LIKE ? ORDER BY name, card, profile, city, slot",
+            (pattern,),
+        )
+        return [SearchHit(*row) for row in rows]
+
+    def find_hash(self, prefix: str) -> list[SearchHit]:
+        """Every slot holding the block with this hash, or a hash starting with it."""
+        prefix_range = hash_prefix_range(prefix)
+        if prefix_range is None:
+            raise Exception(f"{prefix} is not a race hash! Use at least {MIN_PREFIX} hex digits of it.")
+        rows = self.db.execute(
+            "SELECT card, profile, city, slot, name, hash FROM races WHERE hash >= ? AND hash < ? ORDER BY card, profile, city, slot",
+            prefix_range,
+        )
+        return [SearchHit(*row) for row in rows]
+
+def scan_cards(cards: Iterable[str], jobs: int | None = None) -> Iterator[CardScan]:
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(scan_card, card) for card in cards]
+        for future in as_completed(futures):
+            yield future.result()
+
+def update_index(index: SearchIndex, paths: Iterable[str], jobs: int | None = None) -> IndexUpdate:
+    """Scan the cards under paths that changed since the last update, in a process pool."""
+    cards = [os.path.abspath(card) for card in find_memcards(paths, recursive=True)]
+    stale = index.stale_cards(cards)
+    failed = 0
+    for scan in scan_cards(stale, jobs):
+        index.store(scan)
+        if scan.error is not None:
+            failed += 1
+    removed = index.remove_missing()
+    return IndexUpdate(len(stale), len(cards) - len(stale), removed, failed)
@@ -0,0 +1,218 @@
+# Snapshots of a memory card image, kept next to it as <card>.mc3snap
+#
+# The image is cut in raw clusters (pages and their ECC spare bytes) and every
+# snapshot only stores the clusters that differ from the one before it, each
+# block once under its sha256. The first snapshot holds the whole image, so
+# any snapshot can be rebuilt from the clusters stored up to it.
+import hashlib
+import sqlite3
+import time
+from typing import BinaryIO, NamedTuple, cast
+from weakref import WeakKeyDictionary
+
+from mymcplus.ps2mc import ps2mc
+
+from .core import _count, _timed, add_write_hook
+
+SNAPSHOT_EXT = ".mc3snap"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blocks (
+    hash BLOB PRIMARY KEY,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    taken   REAL NOT NULL,
+    profile TEXT,
+    size    INTEGER NOT NULL,
+    chunk   INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    snapshot INTEGER NOT NULL REFERENCES snapshots(id),
+    chunk    INTEGER NOT NULL,
+    hash     BLOB NOT NULL REFERENCES blocks(hash),
+    PRIMARY KEY (snapshot, chunk)
+);
+CREATE TABLE IF NOT EXISTS head (
+    chunk INTEGER PRIMARY KEY,
+    hash  BLOB NOT NULL
+);
+"""
+
+class Snapshot(NamedTuple):
+    id: int
+    taken: float
+    # Profile about to be written when the snapshot was taken, None when taken by hand
+    profile: str | None
+    size: int
+    # Clusters stored by this snapshot, the rest are the same as in the one before
+    changed: int
+
+def snapshot_path(card: str) -> str:
+    return f"{card}{SNAPSHOT_EXT}"
+
+def raw_cluster_size(memcard: ps2mc) -> int:
+    return memcard.raw_page_size * memcard.pages_per_cluster
+
+class SnapshotStore:
+    """Snapshots of one card image. The database is only created by the first snapshot."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._db: sqlite3.Connection | None = None
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        if self._db is None:
+            # Snapshots are taken from the GUI card pool, whose thread may change between jobs
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.executescript(SCHEMA)
+        return self._db
+
+    def __enter__(self) -> "SnapshotStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def snapshots(self) -> list[Snapshot]:
+        rows = self.db.execute(
+            "SELECT id, taken, profile, size, (SELECT COUNT(*) FROM chunks WHERE snapshot = id)"
+            " FROM snapshots ORDER BY id"
+        )
+        return [Snapshot(*row) for row in rows]
+
+    def take(self, memcard: ps2mc, profile: str | None = None) -> Snapshot:
+        """Snapshot the image under an open card, flushing what ps2mc still holds first."""
+        memcard.flush()
+        f = memcard.f
+        f.seek(0)
+        with _timed("snapshot.read"):
+            image = f.read()
+        return self.take_image(image, raw_cluster_size(memcard), profile)
+
+    def take_image(self, image: bytes, chunk: int, profile: str | None = None) -> Snapshot:
+        db = self.db
+        head = dict(db.execute("SELECT chunk, hash FROM head"))
+        last = db.execute("SELECT id, taken, profile, size, chunk FROM snapshots ORDER BY id DESC LIMIT 1").fetchone()
+        if last is not None and last[3:] != (len(image), chunk):
+            # A resized or reformatted card has nothing in common with the old snapshots
+            head = {}
+
+        count = -(-len(image) // chunk)
+        view = memoryview(image)
+        changed = []
+        with _timed("snapshot.hash"):
+            for n, start in enumerate(range(0, len(image), chunk)):
+                block = view[start : start + chunk]
+                digest = hashlib.sha256(block).digest()
+                if head.get(n) != digest:
+                    changed.append((n, digest, block))
+
+        if not changed and last is not None:
+            # Same image as the last snapshot, which already covers it
+            return Snapshot(*last[:4], 0)
+
+        now = time.time()
+        with db:
+            cursor = db.execute(
+                "INSERT INTO snapshots (taken, profile, size, chunk) VALUES (?, ?, ?, ?)",
+                (now, profile, len(image), chunk),
+            )
+            snapshot = cast(int, cursor.lastrowid)
+            for n, digest, block in changed:
+                db.execute("INSERT OR IGNORE INTO blocks (hash, data) VALUES (?, ?)", (digest, bytes(block)))
+                db.execute("INSERT INTO chunks (snapshot, chunk, hash) VALUES (?, ?, ?)", (snapshot, n, digest))
+                db.execute("INSERT OR REPLACE INTO head (chunk, hash) VALUES (?, ?)", (n, digest))
+            db.execute("DELETE FROM head WHERE chunk >= ?", (count,))
+
+        _count("snapshot.chunks_stored", len(changed))
+        return Snapshot(snapshot, now, profile, len(image), len(changed))
+
+    def image_at(self, snapshot: int) -> tuple[int, int, dict[int, bytes]]:
+        """Size, cluster size and the hash of every cluster of the image at a snapshot."""
+        row = self.db.execute("SELECT size, chunk FROM snapshots WHERE id = ?", (snapshot,)).fetchone()
+        if row is None:
+            raise Exception(f"Snapshot {snapshot} not found!")
+        size, chunk = row
+        # A resize starts over, so only the snapshots since the last one count
+        start = self.db.execute(
+            "SELECT COALESCE(MAX(id), 0) FROM snapshots WHERE id <= ? AND (size != ? OR chunk != ?)",
+            (snapshot, size, chunk),
+        ).fetchone()[0]
+        # SQLite takes hash from the row holding MAX(snapshot)
+        rows = self.db.execute(
+            "SELECT chunk, hash, MAX(snapshot) FROM chunks WHERE snapshot > ? AND snapshot <= ? GROUP BY chunk",
+            (start, snapshot),
+        )
+        return size, chunk, {n: digest for n, digest, _ in rows}
+
+    def restore(self, f: BinaryIO, snapshot: int) -> int:
+        """
+        Bring the image in f, which must not be open in ps2mc, back to a
+        snapshot. Only the clusters that differ are written. The image as it
+        was is snapshotted first, so a restore can be restored away.
+        Returns the number of clusters written.
+        """
+        size, chunk, target = self.image_at(snapshot)
+        if len(target) < -(-size // chunk):
+            raise Exception(f"Snapshot {snapshot} is missing clusters! Was it pruned?")
+
+        f.seek(0)
+        image = f.read()
+        self.take_image(image, chunk)
+
+        view = memoryview(image)
+        written = 0
+        for n, digest in sorted(target.items()):
+            start = n * chunk
+            if hashlib.sha256(view[start : start + chunk]).digest() == digest:
+                continue
+            (data,) = self.db.execute("SELECT data FROM blocks WHERE hash = ?", (digest,)).fetchone()
+            f.seek(start)
+            f.write(data)
+            written += 1
+        f.truncate(size)
+        f.flush()
+        _count("snapshot.chunks_restored", written)
+        return written
+
+    def prune(self, keep: int) -> int:
+        """Drop all but the last keep snapshots, folding what they stored into the oldest one kept."""
+        ids = [row[0] for row in self.db.execute("SELECT id FROM snapshots ORDER BY id")]
+        if keep < 1 or len(ids) <= keep:
+            return 0
+        base = ids[-keep]
+        size, chunk, state = self.image_at(base)
+        with self.db:
+            self.db.execute("DELETE FROM chunks WHERE snapshot <= ?", (base,))
+            self.db.executemany(
+                "INSERT INTO chunks (snapshot, chunk, hash) VALUES (?, ?, ?)",
+                ((base, n, digest) for n, digest in state.items()),
+            )
+            self.db.execute("DELETE FROM snapshots WHERE id < ?", (base,))
+            self.db.execute("DELETE FROM blocks WHERE hash NOT IN (SELECT hash FROM chunks)")
+        self.db.execute("VACUUM")
+        return len(ids) - keep
+
+# Store of every card that snapshots itself before each write
+_stores: "WeakKeyDictionary[ps2mc, SnapshotStore]" = WeakKeyDictionary()
+
+def _snapshot_before_write(memcard: ps2mc, profile: str) -> None:
+    store = _stores.get(memcard)
+    if store is not None:
+        store.take(memcard, profile)
+
+def enable_snapshots(memcard: ps2mc, store: SnapshotStore) -> None:
+    """Snapshot the card into store before every write_races_file to it."""
+    _stores[memcard] = store
+    add_write_hook(_snapshot_before_write)
+
+def disable_snapshots(memcard: ps2mc) -> None:
+    _stores.pop(memcard, None)